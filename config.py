@@ -30,27 +30,50 @@ class Config:
         os.makedirs(self.processed_data_dir, exist_ok=True)
         
         self.output_csv = os.path.join(self.processed_data_dir, f'financial_data_{datetime.now().strftime("%Y%m%d")}.csv')
+        self.export_max_workers = 8  # Parallel per-symbol file writes
+        self.emit_csv = False  # Also write CSVs alongside the consolidated Parquet file
         
         # Database settings
         self.db_type = 'sqlite'  # 'sqlite', 'mysql', 'postgresql'
         self.db_path = os.path.join(self.data_dir, 'financial_market.db')
         self.db_connection_string = f'sqlite:///{self.db_path}'
+        self.db_chunksize = 1000  # Rows per INSERT batch
         
         # API settings
         self.alpha_vantage_api_key = os.environ.get('ALPHA_VANTAGE_API_KEY', 'demo')
         self.alpha_vantage_base_url = 'https://www.alphavantage.co/query'
+        self.alpha_vantage_requests_per_minute = 120  # API rate limit
+        self.alpha_vantage_rate_limit_file = os.path.join(self.data_dir, '.ratelimit.sqlite')  # None keeps it in memory
+        self.alpha_vantage_max_concurrency = 5  # Maximum in-flight requests
+        self.alpha_vantage_request_timeout = 30  # Seconds
+        self.alpha_vantage_batch_size = 100  # Symbols per BATCH_STOCK_QUOTES request
+        self.alpha_vantage_compact_days = 90  # Gap (business days) a 'compact' request can fill
+        self.api_cache_enabled = True  # Cache daily time series under data/api_cache
         
         # Default query parameters
         self.default_symbols = ['AAPL', 'MSFT', 'GOOGL', 'AMZN', 'META']
         self.default_start_date = (datetime.now() - timedelta(days=365)).strftime('%Y-%m-%d')
         self.default_end_date = datetime.now().strftime('%Y-%m-%d')
         
+        # Extraction parameters
+        self.use_float32 = True  # Store OHLC and derived metrics as float32, Volume as int32
+        
         # Transformation parameters
         self.ma_short_window = 20  # Short-term moving average window
         self.ma_long_window = 50   # Long-term moving average window
         self.volatility_window = 20  # Volatility calculation window
+        self.rsi_window = 14  # RSI (Wilder) period
+        self.bollinger_window = 20  # Bollinger Bands window
+        self.metrics_parallel_min_symbols = 200  # Use worker processes from this many symbols (0 disables)
+        self.metrics_max_workers = None  # Worker processes for metrics (None uses all CPUs)
         
         # Validation thresholds
         self.min_stock_price = 0.01
         self.max_stock_price = 100000
         self.max_missing_percentage = 0.1  # Maximum allowed percentage of missing values
+        self.max_fill_gap = 5  # Longest run of missing values filled from neighbours (None fills any gap)
+        self.enable_validation_cache = False  # Reuse results for frames validated before (validate() only)
+        self.validation_cache_size = 128  # Validated frames kept in memory
+        
+        # Scheduler settings
+        self.scheduler_max_workers = 3  # Independent tasks (e.g. the extract branches) run concurrently
@@ -0,0 +1,47 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Dtype narrowing shared by the pipeline stages that honour ``use_float32``.
+"""
+
+import numpy as np
+
+PRICE_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Adj_Close']
+
+def narrow_dtypes(df, float_cols=None, volume=True):
+    """
+    Narrow float64 columns to float32 and Volume to int32, in place.
+    
+    Columns that are already narrow are skipped without being scanned, so
+    a stage calling this after an earlier one did only pays for the dtype
+    checks. Volume is never made float32, which would round counts above
+    2**24; it is narrowed to int32 when it has no missing values, is
+    integral and fits.
+    
+    Args:
+        df (pandas.DataFrame): Frame to update in place
+        float_cols (list, optional): Columns to narrow; every float64 column but Volume if omitted
+        volume (bool): Whether to narrow the Volume column as well
+    
+    Returns:
+        pandas.DataFrame: The same frame, for chaining
+    """
+    if float_cols is None:
+        float_cols = df.columns[(df.dtypes == np.float64) & (df.columns != 'Volume')]
+    else:
+        float_cols = [col for col in float_cols if col in df.columns and df[col].dtype == np.float64]
+    if len(float_cols) > 0:
+        df[float_cols] = df[float_cols].astype(np.float32)
+    
+    if volume and 'Volume' in df.columns and df['Volume'].dtype in (np.int64, np.float64):
+        values = df['Volume'].to_numpy()
+        info = np.iinfo(np.int32)
+        if len(values) == 0:
+            df['Volume'] = values.astype(np.int32)
+        elif values.min() >= info.min and values.max() <= info.max:
+            # min/max are NaN when anything is missing, failing the range check
+            if values.dtype == np.int64 or np.array_equal(values, np.trunc(values)):
+                df['Volume'] = values.astype(np.int32)
+    
+    return df
@@ -5,16 +5,130 @@
 API Extractor module for extracting financial market data from external APIs.
 """
 
+import asyncio
+import functools
+import hashlib
 import logging
+import numpy as np
 import pandas as pd
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
 import os
+import sqlite3
 import time
 from datetime import datetime
 
+from dtypes import PRICE_COLUMNS, narrow_dtypes
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+try:
+    import ijson
+except ImportError:  # pragma: no cover - ijson is optional
+    ijson = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - pyarrow is optional
+    pa = None
+
 logger = logging.getLogger(__name__)
 
+class RateLimiter:
+    """
+    Token-bucket rate limiter, optionally shared across pipeline runs.
+    
+    With a ``state_path`` the bucket lives in a small SQLite file, so calls
+    made by earlier runs (or other processes using the same API key) count
+    against the same limit. Without one the bucket is kept in memory.
+    """
+    
+    def __init__(self, max_calls, period, state_path=None, key='default'):
+        """
+        Initialize the rate limiter.
+        
+        Args:
+            max_calls (int): Maximum number of calls allowed per period
+            period (float): Length of the period in seconds
+            state_path (str, optional): SQLite file holding the shared bucket
+            key (str): Identifies the bucket, e.g. the API key it limits
+        """
+        self.capacity = float(max_calls)
+        self.fill_rate = max_calls / period
+        self.state_path = state_path
+        # Only a digest of the key is stored on disk
+        self.key = hashlib.sha256(key.encode()).hexdigest()[:16]
+        self.tokens = self.capacity
+        self.last_refill = time.time()
+    
+    async def acquire(self):
+        """Wait until a call can be made without exceeding the rate limit."""
+        loop = asyncio.get_running_loop()
+        while True:
+            if self.state_path is None:
+                wait = self._take_token()
+            else:
+                # The SQLite lock can block for up to its busy timeout, so
+                # take the token on a worker thread rather than the event loop
+                wait = await loop.run_in_executor(None, self._take_token)
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+    
+    def wait(self):
+        """Blocking counterpart of acquire() for synchronous callers."""
+        while True:
+            wait = self._take_token()
+            if wait <= 0:
+                return
+            time.sleep(wait)
+    
+    def _take_token(self):
+        """
+        Take a token from the bucket if one is available.
+        
+        Returns:
+            float: 0 if a token was taken, otherwise seconds until one is available
+        """
+        if self.state_path is None:
+            self.tokens, self.last_refill, wait = self._refill_and_take(self.tokens, self.last_refill)
+            return wait
+        
+        conn = sqlite3.connect(self.state_path, timeout=30, isolation_level=None)
+        try:
+            # BEGIN IMMEDIATE serializes concurrent processes on the same bucket
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS buckets (key TEXT PRIMARY KEY, tokens REAL, updated_at REAL)"
+            )
+            row = conn.execute("SELECT tokens, updated_at FROM buckets WHERE key = ?", (self.key,)).fetchone()
+            tokens, updated_at = row if row else (self.capacity, time.time())
+            
+            tokens, updated_at, wait = self._refill_and_take(tokens, updated_at)
+            conn.execute(
+                "INSERT OR REPLACE INTO buckets (key, tokens, updated_at) VALUES (?, ?, ?)",
+                (self.key, tokens, updated_at)
+            )
+            conn.execute("COMMIT")
+            return wait
+        finally:
+            conn.close()
+    
+    def _refill_and_take(self, tokens, updated_at):
+        """Refill the bucket for the elapsed time and try to take one token."""
+        now = time.time()
+        tokens = min(self.capacity, tokens + max(now - updated_at, 0) * self.fill_rate)
+        
+        if tokens >= 1:
+            return tokens - 1, now, 0
+        return tokens, now, (1 - tokens) / self.fill_rate
+
 class APIExtractor:
     """Extracts financial market data from external APIs."""
     
@@ -28,8 +142,44 @@ class APIExtractor:
         self.config = config
         self.api_key = config.alpha_vantage_api_key
         self.base_url = config.alpha_vantage_base_url
+        self.requests_per_minute = config.alpha_vantage_requests_per_minute
+        self.max_concurrency = config.alpha_vantage_max_concurrency
+        self.request_timeout = config.alpha_vantage_request_timeout
+        self.batch_size = config.alpha_vantage_batch_size
+        self.use_float32 = config.use_float32
+        self.cache_dir = os.path.join(config.data_dir, 'api_cache')
+        self.cache_enabled = config.api_cache_enabled and pa is not None
+        self.compact_output_days = config.alpha_vantage_compact_days
         
-    def extract(self, symbols=None, start_date=None, end_date=None):
+        # Reuse keep-alive connections across requests and retry transient failures
+        pool_size = max(self.max_concurrency, 1)
+        adapter = HTTPAdapter(
+            pool_connections=pool_size,
+            pool_maxsize=pool_size,
+            max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504],
+                              allowed_methods=None)
+        )
+        self.session = requests.Session()
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        
+        # One bucket per API key, shared by every request this key makes
+        state_path = config.alpha_vantage_rate_limit_file
+        if state_path and os.path.dirname(state_path):
+            os.makedirs(os.path.dirname(state_path), exist_ok=True)
+        self.limiter = RateLimiter(self.requests_per_minute, 60, state_path=state_path, key=self.api_key)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
+    def close(self):
+        """Close the underlying HTTP session and its pooled connections."""
+        self.session.close()
+        
+    def extract(self, symbols=None, start_date=None, end_date=None, latest_only=False):
         """
         Extract data from financial APIs.
         
@@ -37,6 +187,9 @@ class APIExtractor:
             symbols (list): List of stock symbols to fetch
             start_date (str): Start date in YYYY-MM-DD format
             end_date (str): End date in YYYY-MM-DD format
+            latest_only (bool): Only fetch the latest quote for each symbol.
+                Implied when start_date equals end_date and is the latest
+                trading day.
         
         Returns:
             pandas.DataFrame: Extracted data
@@ -60,91 +213,429 @@ class APIExtractor:
         # In a real implementation, this would make actual API calls
         if self.api_key == 'demo':
             logger.warning("Using demo API key. Creating mock data instead of real API calls.")
-            return self._create_mock_api_data(symbols, start_date, end_date)
+            return self._downcast(self._create_mock_api_data(symbols, start_date, end_date))
+        
+        # Compare against Timestamps rather than strings in the date filter
+        start_dt = pd.Timestamp(start_date)
+        end_dt = pd.Timestamp(end_date)
         
-        # Initialize empty dataframe to store all results
-        all_data = pd.DataFrame()
+        # Latest quotes for many symbols come back in a single batch request.
+        # The batch endpoint only knows the current quote, so a single-day
+        # range takes it only if that day is the latest trading day
+        latest_day = pd.offsets.BDay().rollback(pd.Timestamp.now().normalize())
+        single_latest_day = start_dt == end_dt and pd.offsets.BDay().rollback(end_dt) == latest_day
+        if latest_only or single_latest_day:
+            all_data = self._fetch_batch_quotes(symbols)
+            if not latest_only and len(all_data) > 0:
+                # A quote from before the requested day (e.g. ahead of the
+                # open) does not answer the request
+                in_range = (all_data['Date'] >= start_dt) & (all_data['Date'] <= end_dt)
+                all_data = all_data[in_range].reset_index(drop=True)
+            if len(all_data) > 0:
+                logger.info(f"Total records extracted from API: {len(all_data)}")
+                return self._downcast(all_data)
+            logger.warning("No batch quotes retrieved from API. Falling back to daily time series.")
         
-        # Fetch data for each symbol
+        # Serve what we can from the local cache and work out how much
+        # history still has to be requested for each symbol
+        cached = {}
+        output_sizes = {}
         for symbol in symbols:
+            cached[symbol] = self._read_cache(symbol)
+            output_sizes[symbol] = self._plan_request(cached[symbol], start_date, end_date)
+        
+        to_fetch = [symbol for symbol in symbols if output_sizes[symbol] is not None]
+        if len(to_fetch) < len(symbols):
+            logger.info(f"Serving {len(symbols) - len(to_fetch)} symbols from the API cache")
+        
+        # Fetch the remaining symbols concurrently
+        fetched = asyncio.run(self._extract_async(to_fetch, output_sizes)) if to_fetch else {}
+        
+        frames = []
+        for symbol in symbols:
+            df = cached[symbol]
+            
+            new_df = fetched.get(symbol)
+            if new_df is not None:
+                df = self._update_cache(symbol, df, new_df, complete=output_sizes[symbol] == 'full')
+            
+            if df is None:
+                continue
+            
+            # Filter by date range
+            mask = (df['Date'] >= start_dt) & (df['Date'] <= end_dt)
+            frames.append(df.loc[mask])
+        
+        all_data = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+        
+        # If we didn't get any data, return mock data for demo purposes
+        if len(all_data) == 0:
+            logger.warning("No data retrieved from API. Using mock data.")
+            return self._downcast(self._create_mock_api_data(symbols, start_date, end_date))
+        
+        logger.info(f"Total records extracted from API: {len(all_data)}")
+        return self._downcast(all_data)
+    
+    def _downcast(self, df):
+        """
+        Narrow OHLC prices to float32 and Volume to int32 to halve memory use.
+        
+        Volume is left untouched if it has missing values or does not fit in int32.
+        
+        Args:
+            df (pandas.DataFrame): Extracted data
+        
+        Returns:
+            pandas.DataFrame: Data with narrowed numeric dtypes
+        """
+        if not self.use_float32:
+            return df
+        
+        return narrow_dtypes(df, PRICE_COLUMNS)
+    
+    def _fetch_batch_quotes(self, symbols):
+        """
+        Fetch the latest quote for each symbol using BATCH_STOCK_QUOTES.
+        
+        Args:
+            symbols (list): List of stock symbols to fetch
+        
+        Returns:
+            pandas.DataFrame: One row per symbol with the latest price and volume
+        """
+        frames = []
+        
+        # Keep each request comfortably within URL-length limits
+        for i in range(0, len(symbols), self.batch_size):
+            chunk = symbols[i:i + self.batch_size]
+            params = {
+                'function': 'BATCH_STOCK_QUOTES',
+                'symbols': ','.join(chunk),
+                'apikey': self.api_key,
+                'datatype': 'json'
+            }
+            
+            self.limiter.wait()
+            logger.info(f"Fetching batch quotes for {len(chunk)} symbols")
+            
             try:
-                # Alpha Vantage API parameters for daily time series
-                params = {
-                    'function': 'TIME_SERIES_DAILY',
-                    'symbol': symbol,
-                    'apikey': self.api_key,
-                    'outputsize': 'full',
-                    'datatype': 'json'
-                }
-                
-                logger.info(f"Fetching data for {symbol}")
+                response = self.session.post(self.base_url, data=params, timeout=self.request_timeout)
                 
-                # Make API request
-                response = requests.get(self.base_url, params=params)
+                if response.status_code != 200:
+                    logger.error(f"Batch quote request failed: {response.status_code} - {response.text}")
+                    continue
                 
-                # Check if request was successful
-                if response.status_code == 200:
-                    data = response.json()
-                    
-                    # Parse the Alpha Vantage response
-                    if 'Time Series (Daily)' in data:
-                        time_series = data['Time Series (Daily)']
-                        
-                        # Convert to DataFrame
-                        df = pd.DataFrame.from_dict(time_series, orient='index')
-                        
-                        # Rename columns
-                        df.columns = [col.split('. ')[1] for col in df.columns]
-                        
-                        # Add symbol column
-                        df['Symbol'] = symbol
-                        
-                        # Convert index to datetime and add as column
-                        df.index = pd.to_datetime(df.index)
-                        df['Date'] = df.index
-                        df.reset_index(drop=True, inplace=True)
-                        
-                        # Filter by date range
-                        mask = (df['Date'] >= start_date) & (df['Date'] <= end_date)
-                        df = df.loc[mask]
-                        
-                        # Convert numeric columns to float
-                        for col in ['open', 'high', 'low', 'close', 'volume']:
-                            if col in df.columns:
-                                df[col] = df[col].astype(float)
-                        
-                        # Rename columns to match our standard format
-                        df.rename(columns={
-                            'open': 'Open',
-                            'high': 'High',
-                            'low': 'Low',
-                            'close': 'Close',
-                            'volume': 'Volume'
-                        }, inplace=True)
-                        
-                        # Append to main dataframe
-                        all_data = pd.concat([all_data, df])
-                        
-                        logger.info(f"Successfully retrieved {len(df)} records for {symbol}")
-                    else:
-                        logger.warning(f"No time series data found for {symbol}")
-                else:
-                    logger.error(f"API request failed for {symbol}: {response.status_code} - {response.text}")
+                quotes = self._parse_json(response).get('Stock Quotes', [])
+                if not quotes:
+                    logger.warning(f"No batch quotes found for {chunk}")
+                    continue
                 
-                # API rate limiting - sleep to avoid hitting rate limits
-                time.sleep(1)
+                df = pd.DataFrame(quotes)
+                df.columns = [col.split('. ')[1] for col in df.columns]
+                frames.append(df)
                 
             except Exception as e:
-                logger.error(f"Error fetching data for {symbol}: {str(e)}")
+                logger.error(f"Error fetching batch quotes for {chunk}: {str(e)}")
                 continue
         
-        # If we didn't get any data, return mock data for demo purposes
-        if len(all_data) == 0:
-            logger.warning("No data retrieved from API. Using mock data.")
-            return self._create_mock_api_data(symbols, start_date, end_date)
+        if not frames:
+            return pd.DataFrame()
         
-        logger.info(f"Total records extracted from API: {len(all_data)}")
-        return all_data
+        quotes = pd.concat(frames, ignore_index=True)
+        price = pd.to_numeric(quotes['price'], errors='coerce')
+        
+        # Only a single price is returned, so it stands in for the whole OHLC bar
+        df = pd.DataFrame({
+            'Date': pd.to_datetime(quotes['timestamp']).dt.normalize(),
+            'Symbol': quotes['symbol'],
+            'Open': price,
+            'High': price,
+            'Low': price,
+            'Close': price,
+            'Volume': pd.to_numeric(quotes['volume'], errors='coerce')
+        })
+        
+        logger.info(f"Successfully retrieved batch quotes for {len(df)} symbols")
+        return df
+    
+    async def _extract_async(self, symbols, output_sizes=None):
+        """
+        Fetch and parse the daily time series for all symbols concurrently.
+        
+        Each response is parsed as soon as it arrives, while the remaining
+        requests are still in flight, so parsing overlaps with network time.
+        
+        Args:
+            symbols (list): List of stock symbols to fetch
+            output_sizes (dict, optional): Alpha Vantage outputsize ('full' or
+                'compact') per symbol. Defaults to 'full'.
+        
+        Returns:
+            dict: Parsed DataFrame per symbol, or None if nothing was retrieved
+        """
+        sem = asyncio.Semaphore(self.max_concurrency)
+        limiter = self.limiter
+        output_sizes = output_sizes or {}
+        params_base = {
+            'function': 'TIME_SERIES_DAILY',
+            'apikey': self.api_key,
+            'datatype': 'json'
+        }
+        
+        # All tasks start eagerly; the semaphore and limiter decide when each
+        # request is actually sent
+        pending = {
+            asyncio.ensure_future(self._fetch_symbol(
+                sem, limiter, symbol, dict(params_base, outputsize=output_sizes.get(symbol, 'full'))
+            )): symbol
+            for symbol in symbols
+        }
+        
+        results = {}
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            
+            for task in done:
+                symbol = pending.pop(task)
+                results[symbol] = None
+                
+                try:
+                    columns = task.result()
+                except Exception as e:
+                    logger.error(f"Error fetching data for {symbol}: {str(e)}")
+                    continue
+                
+                if columns is None:
+                    continue
+                
+                try:
+                    results[symbol] = self._parse_time_series(symbol, columns)
+                except Exception as e:
+                    logger.error(f"Error parsing data for {symbol}: {str(e)}")
+        
+        return results
+    
+    async def _fetch_symbol(self, sem, limiter, symbol, params_base):
+        """
+        Fetch the daily time series for a single symbol.
+        
+        The blocking request runs in the default executor so that several
+        symbols can be in flight at once.
+        
+        Args:
+            sem (asyncio.Semaphore): Caps the number of in-flight requests
+            limiter (RateLimiter): Keeps us within the API rate limit
+            symbol (str): Stock symbol to fetch
+            params_base (dict): Query parameters shared by all symbols
+        
+        Returns:
+            dict: Column lists of the time series, or None if the request failed
+        """
+        params = dict(params_base, symbol=symbol)
+        loop = asyncio.get_running_loop()
+        
+        async with sem:
+            await limiter.acquire()
+            logger.info(f"Fetching data for {symbol}")
+            return await loop.run_in_executor(
+                None, functools.partial(self._request_time_series, symbol, params)
+            )
+    
+    def _request_time_series(self, symbol, params):
+        """
+        Request the daily time series for a symbol and collect it into columns.
+        
+        With ijson installed the response body is parsed as it is received,
+        so the full JSON document is never held in memory as nested dicts.
+        
+        Args:
+            symbol (str): Stock symbol to fetch
+            params (dict): Query parameters for the request
+        
+        Returns:
+            dict: Column lists keyed by Date/Open/High/Low/Close/Volume,
+                or None if the request failed
+        """
+        response = self.session.get(self.base_url, params=params, timeout=self.request_timeout, stream=True)
+        
+        with response:
+            # Check if request was successful
+            if response.status_code != 200:
+                logger.error(f"API request failed for {symbol}: {response.status_code} - {response.text}")
+                return None
+            
+            if ijson is not None:
+                # Let urllib3 undo any gzip transfer encoding before parsing
+                response.raw.decode_content = True
+                time_series = ijson.kvitems(response.raw, 'Time Series (Daily)')
+            else:
+                time_series = self._parse_json(response).get('Time Series (Daily)', {}).items()
+            
+            columns = {'Date': [], 'Open': [], 'High': [], 'Low': [], 'Close': [], 'Volume': []}
+            for date, bar in time_series:
+                columns['Date'].append(date)
+                columns['Open'].append(bar['1. open'])
+                columns['High'].append(bar['2. high'])
+                columns['Low'].append(bar['3. low'])
+                columns['Close'].append(bar['4. close'])
+                columns['Volume'].append(bar['5. volume'])
+        
+        return columns
+    
+    def _parse_json(self, response):
+        """
+        Parse a JSON response body, using orjson if available.
+        
+        Args:
+            response (requests.Response): Response to parse
+        
+        Returns:
+            dict: Parsed JSON
+        """
+        if orjson is not None:
+            return orjson.loads(response.content)
+        return response.json()
+    
+    def _parse_time_series(self, symbol, columns):
+        """
+        Convert the collected TIME_SERIES_DAILY columns into a DataFrame.
+        
+        Args:
+            symbol (str): Stock symbol the data belongs to
+            columns (dict): Column lists returned by _request_time_series
+        
+        Returns:
+            pandas.DataFrame: Parsed data, or None if the response has no time series
+        """
+        if not columns['Date']:
+            logger.warning(f"No time series data found for {symbol}")
+            return None
+        
+        # Build the DataFrame directly with the final column names and dtypes
+        df = pd.DataFrame({
+            'Date': pd.to_datetime(columns['Date'], format='%Y-%m-%d', cache=True),
+            'Symbol': symbol,
+            'Open': np.asarray(columns['Open'], dtype=np.float64),
+            'High': np.asarray(columns['High'], dtype=np.float64),
+            'Low': np.asarray(columns['Low'], dtype=np.float64),
+            'Close': np.asarray(columns['Close'], dtype=np.float64),
+            'Volume': np.asarray(columns['Volume'], dtype=np.float64)
+        })
+        
+        logger.info(f"Successfully retrieved {len(df)} records for {symbol}")
+        return df
+    
+    def _plan_request(self, cache_df, start_date, end_date):
+        """
+        Decide how much history has to be requested for a symbol.
+        
+        Daily bars for past dates never change, so a symbol only needs a
+        request if the cache is missing part of the date range. A fetch made
+        after end_date already returned every bar the range can contain, even
+        across exchange holidays that a business-day calendar does not know.
+        Alpha Vantage cannot return an arbitrary range, but 'compact' (the
+        latest 100 bars) is enough to top up a cache that is only missing
+        recent days.
+        
+        Args:
+            cache_df (pandas.DataFrame): Cached data for the symbol, or None
+            start_date (str): Start date in YYYY-MM-DD format
+            end_date (str): End date in YYYY-MM-DD format
+        
+        Returns:
+            str: 'full' or 'compact', or None if the cache covers the range
+        """
+        if cache_df is None or len(cache_df) == 0:
+            return 'full'
+        
+        first, last = cache_df['Date'].min(), cache_df['Date'].max()
+        
+        # A full fetch already returned everything that exists before `first`
+        if first > pd.Timestamp(start_date) and not cache_df.attrs.get('complete_history'):
+            return 'full'
+        
+        # Every bar up to end_date existed when the cache was last fetched
+        fetched_at = cache_df.attrs.get('fetched_at')
+        if fetched_at is not None and pd.Timestamp(fetched_at).normalize() > pd.Timestamp(end_date):
+            return None
+        
+        # Most recent trading day the requested range can contain
+        today = pd.Timestamp.now().normalize()
+        last_needed = pd.offsets.BDay().rollback(min(pd.Timestamp(end_date), today))
+        if last >= last_needed:
+            return None
+        
+        if last >= today - pd.offsets.BDay(self.compact_output_days):
+            return 'compact'
+        return 'full'
+    
+    def _read_cache(self, symbol):
+        """
+        Read the cached daily time series for a symbol.
+        
+        Args:
+            symbol (str): Stock symbol
+        
+        Returns:
+            pandas.DataFrame: Cached data, or None if there is no usable cache
+        """
+        if not self.cache_enabled:
+            return None
+        
+        cache_path = os.path.join(self.cache_dir, f"{symbol}.parquet")
+        if not os.path.exists(cache_path):
+            return None
+        
+        try:
+            table = pq.read_table(cache_path)
+            df = table.to_pandas()
+            metadata = table.schema.metadata or {}
+            df.attrs['complete_history'] = metadata.get(b'complete_history') == b'true'
+            if b'fetched_at' in metadata:
+                df.attrs['fetched_at'] = metadata[b'fetched_at'].decode()
+            return df
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable API cache file {cache_path}: {str(e)}")
+            return None
+    
+    def _update_cache(self, symbol, cache_df, new_df, complete=False):
+        """
+        Merge freshly fetched data into a symbol's cache and write it back.
+        
+        Args:
+            symbol (str): Stock symbol
+            cache_df (pandas.DataFrame): Previously cached data, or None
+            new_df (pandas.DataFrame): Freshly fetched data
+            complete (bool): Whether new_df holds the symbol's full history
+        
+        Returns:
+            pandas.DataFrame: Merged data for the symbol
+        """
+        complete_history = complete
+        if cache_df is not None:
+            complete_history = complete_history or cache_df.attrs.get('complete_history', False)
+            new_df = pd.concat([cache_df, new_df], ignore_index=True)
+            new_df = new_df.drop_duplicates(subset='Date', keep='last')
+        
+        df = new_df.sort_values('Date', ignore_index=True)
+        df.attrs['complete_history'] = complete_history
+        df.attrs['fetched_at'] = pd.Timestamp.now().isoformat()
+        
+        if not self.cache_enabled:
+            return df
+        
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            metadata = dict(table.schema.metadata or {})
+            metadata[b'complete_history'] = b'true' if complete_history else b'false'
+            metadata[b'fetched_at'] = df.attrs['fetched_at'].encode()
+            pq.write_table(table.replace_schema_metadata(metadata),
+                           os.path.join(self.cache_dir, f"{symbol}.parquet"), compression='zstd')
+        except Exception as e:
+            logger.warning(f"Could not update API cache for {symbol}: {str(e)}")
+        
+        return df
     
     def _create_mock_api_data(self, symbols, start_date, end_date):
         """Create mock API data for demonstration purposes."""
@@ -159,40 +650,37 @@ class APIExtractor:
         # Generate date range
         date_range = pd.date_range(start=start_dt, end=end_dt, freq='B')  # Business days
         
-        # Create empty list to store data
-        data = []
+        rng = np.random.default_rng()
+        n_symbols, n_dates = len(symbols), len(date_range)
+        shape = (n_symbols, n_dates)
         
-        # Generate random stock price data
-        for symbol in symbols:
-            # Start with a base price between 50 and 500
-            base_price = np.random.uniform(50, 500)
-            
-            # Generate daily price movements with some randomness
-            price = base_price
-            for date in date_range:
-                # Daily price change (-2% to +2%)
-                daily_change = np.random.normal(0.0005, 0.015)
-                price = price * (1 + daily_change)
-                
-                # Add some volume
-                volume = int(np.random.normal(1000000, 500000))
-                if volume < 100000:
-                    volume = 100000
-                
-                # Add to data list
-                data.append({
-                    'Date': date,
-                    'Symbol': symbol,
-                    'Open': round(price * (1 - np.random.uniform(0, 0.005)), 2),
-                    'High': round(price * (1 + np.random.uniform(0, 0.01)), 2),
-                    'Low': round(price * (1 - np.random.uniform(0, 0.01)), 2),
-                    'Close': round(price, 2),
-                    'Volume': volume,
-                    'Source': 'API'
-                })
-        
-        # Create DataFrame
-        df = pd.DataFrame(data)
+        # Start each symbol with a base price between 50 and 500 and apply
+        # daily price movements with some randomness
+        base_price = rng.uniform(50, 500, n_symbols)
+        daily_change = rng.normal(0.0005, 0.015, shape)
+        close = base_price[:, None] * np.cumprod(1 + daily_change, axis=1)
+        
+        # Add some volume
+        volume = np.clip(rng.normal(1000000, 500000, shape).astype(np.int64), 100000, None)
+        
+        # Produce the final dtypes up front so _downcast has nothing left to convert
+        price_dtype = np.float32 if self.use_float32 else np.float64
+        volume_dtype = np.int32 if self.use_float32 else np.int64
+        
+        def prices(values):
+            return np.round(values, 2).astype(price_dtype).ravel()
+        
+        # Create DataFrame, one row per (symbol, date) in symbol-major order
+        df = pd.DataFrame({
+            'Date': np.tile(date_range, n_symbols),
+            'Symbol': np.repeat(symbols, n_dates),
+            'Open': prices(close * (1 - rng.uniform(0, 0.005, shape))),
+            'High': prices(close * (1 + rng.uniform(0, 0.01, shape))),
+            'Low': prices(close * (1 - rng.uniform(0, 0.01, shape))),
+            'Close': prices(close),
+            'Volume': volume.astype(volume_dtype).ravel(),
+            'Source': 'API'
+        })
         
         logger.info(f"Created mock API data with {len(df)} records")
         return df
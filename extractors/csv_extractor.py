@@ -9,6 +9,12 @@ import logging
 import pandas as pd
 import os
 
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+except ImportError:  # pragma: no cover - pyarrow is optional
+    pa = None
+
 logger = logging.getLogger(__name__)
 
 class CSVExtractor:
@@ -44,7 +50,7 @@ class CSVExtractor:
         
         try:
             # Read CSV file
-            df = pd.read_csv(self.source_file, parse_dates=['Date'])
+            df = self._read_csv()
             
             # Basic info about the extracted data
             logger.info(f"Extracted {len(df)} rows from CSV file")
@@ -56,6 +62,30 @@ class CSVExtractor:
             logger.error(f"Error extracting data from CSV file: {str(e)}")
             raise
     
+    def _read_csv(self):
+        """
+        Read the source CSV, using Arrow's multi-threaded reader if available.
+        
+        Returns:
+            pandas.DataFrame: Raw data with numpy-backed columns
+        """
+        if pa is not None:
+            try:
+                convert_options = pacsv.ConvertOptions(column_types={
+                    'Date': pa.timestamp('ns'),
+                    'Open': pa.float64(),
+                    'High': pa.float64(),
+                    'Low': pa.float64(),
+                    'Close': pa.float64(),
+                    'Volume': pa.int64()
+                })
+                table = pacsv.read_csv(self.source_file, convert_options=convert_options)
+                return table.to_pandas()
+            except (pa.ArrowInvalid, pa.ArrowNotImplementedError, pa.ArrowTypeError) as e:
+                logger.warning(f"Arrow CSV reader failed for {self.source_file}, falling back to pandas: {str(e)}")
+        
+        return pd.read_csv(self.source_file, parse_dates=['Date'])
+    
     def _create_sample_data(self):
         """Create sample stock price data for demonstration purposes."""
         import numpy as np
@@ -69,39 +99,29 @@ class CSVExtractor:
         # Sample stock symbols
         symbols = self.config.default_symbols
         
-        # Create empty list to store data
-        data = []
+        rng = np.random.default_rng()
+        n_symbols, n_dates = len(symbols), len(dates)
+        shape = (n_symbols, n_dates)
         
-        # Generate random stock price data
-        for symbol in symbols:
-            # Start with a base price between 50 and 500
-            base_price = np.random.uniform(50, 500)
-            
-            # Generate daily price movements with some randomness
-            price = base_price
-            for date in dates:
-                # Daily price change (-2% to +2%)
-                daily_change = np.random.normal(0.0005, 0.015)
-                price = price * (1 + daily_change)
-                
-                # Add some volume
-                volume = int(np.random.normal(1000000, 500000))
-                if volume < 100000:
-                    volume = 100000
-                
-                # Add to data list
-                data.append({
-                    'Date': date.strftime('%Y-%m-%d'),
-                    'Symbol': symbol,
-                    'Open': round(price * (1 - np.random.uniform(0, 0.005)), 2),
-                    'High': round(price * (1 + np.random.uniform(0, 0.01)), 2),
-                    'Low': round(price * (1 - np.random.uniform(0, 0.01)), 2),
-                    'Close': round(price, 2),
-                    'Volume': volume
-                })
+        # Start each symbol with a base price between 50 and 500 and apply
+        # daily price movements with some randomness
+        base_price = rng.uniform(50, 500, n_symbols)
+        daily_change = rng.normal(0.0005, 0.015, shape)
+        close = base_price[:, None] * np.cumprod(1 + daily_change, axis=1)
+        
+        # Add some volume
+        volume = np.clip(rng.normal(1000000, 500000, shape).astype(np.int64), 100000, None)
         
-        # Create DataFrame
-        df = pd.DataFrame(data)
+        # Create DataFrame, one row per (symbol, date) in symbol-major order
+        df = pd.DataFrame({
+            'Date': np.tile(dates.strftime('%Y-%m-%d'), n_symbols),
+            'Symbol': np.repeat(symbols, n_dates),
+            'Open': np.round(close * (1 - rng.uniform(0, 0.005, shape)), 2).ravel(),
+            'High': np.round(close * (1 + rng.uniform(0, 0.01, shape)), 2).ravel(),
+            'Low': np.round(close * (1 - rng.uniform(0, 0.01, shape)), 2).ravel(),
+            'Close': np.round(close, 2).ravel(),
+            'Volume': volume.ravel()
+        })
         
         # Ensure the directory exists
         os.makedirs(os.path.dirname(self.source_file), exist_ok=True)
@@ -10,6 +10,11 @@ import json
 import pandas as pd
 import os
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
 class JSONExtractor:
@@ -45,15 +50,20 @@ class JSONExtractor:
         
         try:
             # Read JSON file
-            with open(self.source_file, 'r') as f:
-                data = json.load(f)
+            if orjson is not None:
+                with open(self.source_file, 'rb') as f:
+                    data = orjson.loads(f.read())
+            else:
+                with open(self.source_file, 'r') as f:
+                    data = json.load(f)
             
             # Convert to DataFrame
             df = pd.DataFrame(data['indicators'])
             
-            # Convert date strings to datetime objects
+            # Convert date strings to datetime objects; ISO 8601 covers both
+            # plain dates and timestamps such as 2024-01-01T00:00:00
             if 'date' in df.columns:
-                df['date'] = pd.to_datetime(df['date'])
+                df['date'] = pd.to_datetime(df['date'], format='ISO8601', cache=True)
             
             # Basic info about the extracted data
             logger.info(f"Extracted {len(df)} rows from JSON file")
@@ -148,7 +158,11 @@ class JSONExtractor:
         os.makedirs(os.path.dirname(self.source_file), exist_ok=True)
         
         # Save to JSON file
-        with open(self.source_file, 'w') as f:
-            json.dump(json_data, f, indent=2)
+        if orjson is not None:
+            with open(self.source_file, 'wb') as f:
+                f.write(orjson.dumps(json_data, option=orjson.OPT_INDENT_2))
+        else:
+            with open(self.source_file, 'w') as f:
+                json.dump(json_data, f, indent=2)
         
         logger.info(f"Created sample economic indicators data: {self.source_file}")
@@ -2,18 +2,25 @@
 # -*- coding: utf-8 -*-
 
 """
-CSV Loader module for exporting financial market data to CSV files.
+CSV Loader module for exporting financial market data to Parquet and CSV files.
 """
 
 import logging
 import os
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - pyarrow is optional
+    pa = None
+
 logger = logging.getLogger(__name__)
 
 class CSVLoader:
-    """Exports financial market data to CSV files."""
+    """Exports financial market data to Parquet files, and to CSV files on request."""
     
     def __init__(self, config):
         """
@@ -24,10 +31,16 @@ class CSVLoader:
         """
         self.config = config
         self.output_dir = config.processed_data_dir
+        self.max_workers = config.export_max_workers
+        self.emit_csv = config.emit_csv
     
     def export(self, data):
         """
-        Export data to CSV files.
+        Export data to files in the processed data directory.
+        
+        Stock price data is written as one consolidated Parquet file, plus
+        per-symbol and consolidated CSV files when ``emit_csv`` is set or
+        pyarrow is unavailable. Other data is written as a single CSV file.
         
         Args:
             data (pandas.DataFrame): Data to export
@@ -36,10 +49,10 @@ class CSVLoader:
             bool: True if successful, False otherwise
         """
         if data is None or len(data) == 0:
-            logger.warning("No data to export to CSV")
+            logger.warning("No data to export")
             return False
         
-        logger.info(f"Exporting {len(data)} rows to CSV")
+        logger.info(f"Exporting {len(data)} rows to {self.output_dir}")
         
         try:
             # Create output directory if it doesn't exist
@@ -51,37 +64,96 @@ class CSVLoader:
             # Determine file name based on data structure
             if 'Symbol' in data.columns and 'Close' in data.columns:
                 # For stock price data, create a file per symbol
-                symbols = data['Symbol'].unique()
+                # Parquet is the canonical consolidated output; CSVs are only
+                # written on request (or when pyarrow is unavailable)
+                wrote_parquet = False
+                if pa is not None:
+                    all_data_filename = os.path.join(self.output_dir, f"all_stock_prices_{timestamp}.parquet")
+                    wrote_parquet = self._write_parquet(data, all_data_filename)
+                    if wrote_parquet:
+                        logger.info(f"Exported consolidated data to {all_data_filename}")
                 
-                for symbol in symbols:
-                    symbol_data = data[data['Symbol'] == symbol].copy()
+                if self.emit_csv or not wrote_parquet:
+                    # Partition the rows by symbol in a single pass
+                    grouped = data.groupby('Symbol', sort=False)
                     
-                    # Create filename for this symbol
-                    filename = os.path.join(self.output_dir, f"{symbol}_prices_{timestamp}.csv")
+                    # The writes are independent and I/O-bound, so overlap them
+                    with ThreadPoolExecutor(max_workers=min(self.max_workers, grouped.ngroups)) as executor:
+                        futures = [
+                            executor.submit(self._export_symbol, symbol_data, symbol, timestamp)
+                            for symbol, symbol_data in grouped
+                        ]
+                        for future in as_completed(futures):
+                            future.result()
                     
-                    # Export to CSV
-                    symbol_data.to_csv(filename, index=False)
-                    logger.info(f"Exported {len(symbol_data)} rows for {symbol} to {filename}")
-                
-                # Also export a consolidated file
-                all_data_filename = os.path.join(self.output_dir, f"all_stock_prices_{timestamp}.csv")
-                data.to_csv(all_data_filename, index=False)
-                logger.info(f"Exported consolidated data to {all_data_filename}")
+                    # Also export a consolidated file
+                    all_data_filename = os.path.join(self.output_dir, f"all_stock_prices_{timestamp}.csv")
+                    self._write_csv(data, all_data_filename)
+                    logger.info(f"Exported consolidated data to {all_data_filename}")
                 
             elif any(col in data.columns for col in ['GDP_Growth', 'Unemployment_Rate', 'Inflation_Rate']):
                 # For economic indicators
                 filename = os.path.join(self.output_dir, f"economic_indicators_{timestamp}.csv")
-                data.to_csv(filename, index=False)
+                self._write_csv(data, filename)
                 logger.info(f"Exported {len(data)} rows of economic indicators to {filename}")
                 
             else:
                 # Generic financial data
                 filename = os.path.join(self.output_dir, f"financial_data_{timestamp}.csv")
-                data.to_csv(filename, index=False)
+                self._write_csv(data, filename)
                 logger.info(f"Exported {len(data)} rows of financial data to {filename}")
             
             return True
             
         except Exception as e:
-            logger.error(f"Error exporting data to CSV: {str(e)}")
+            logger.error(f"Error exporting data: {str(e)}")
+            return False
+    
+    def _export_symbol(self, symbol_data, symbol, timestamp):
+        """
+        Export the data for a single symbol to its own CSV file.
+        
+        Args:
+            symbol_data (pandas.DataFrame): Rows for this symbol
+            symbol (str): Stock symbol
+            timestamp (str): Timestamp used in the filename
+        """
+        # Create filename for this symbol
+        filename = os.path.join(self.output_dir, f"{symbol}_prices_{timestamp}.csv")
+        
+        # Export to CSV
+        self._write_csv(symbol_data, filename)
+        logger.info(f"Exported {len(symbol_data)} rows for {symbol} to {filename}")
+    
+    def _write_csv(self, df, path):
+        """
+        Write a DataFrame to CSV.
+        
+        Always uses pandas: Arrow's CSV writer quotes every header and string
+        field and formats floats differently (``3116`` for ``3116.0``,
+        ``0.0000177`` for ``1.77e-05``), which would change the exported files.
+        
+        Args:
+            df (pandas.DataFrame): Data to write
+            path (str): Output file path
+        """
+        df.to_csv(path, index=False)
+    
+    def _write_parquet(self, df, path):
+        """
+        Write a DataFrame to a Snappy-compressed Parquet file.
+        
+        Args:
+            df (pandas.DataFrame): Data to write
+            path (str): Output file path
+        
+        Returns:
+            bool: True if the file was written, False if Arrow could not convert the data
+        """
+        try:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            pq.write_table(table, path, compression='snappy')
+            return True
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError, pa.ArrowTypeError) as e:
+            logger.warning(f"Arrow Parquet writer failed for {path}, falling back to CSV: {str(e)}")
             return False
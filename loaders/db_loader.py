@@ -7,13 +7,53 @@ Database Loader module for loading financial market data into databases.
 
 import logging
 import os
+import numpy as np
 import pandas as pd
 import sqlite3
-from sqlalchemy import create_engine, Table, Column, Integer, Float, String, DateTime, MetaData
+from sqlalchemy import create_engine, event, Table, Column, Integer, Float, String, DateTime, MetaData
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+def _shortest_float64(values):
+    """
+    Widen float32 values to the float64 of their shortest decimal repr.
+    
+    Matches ``values.astype(str).astype(np.float64)`` for magnitudes from
+    1e-7 to 1e15 without building strings: for 1 to 9 significant digits, each value is rounded to that
+    many digits and kept at the first precision that rounds back to the
+    same float32.
+    
+    Args:
+        values (numpy.ndarray): float32 values
+    
+    Returns:
+        numpy.ndarray: float64 values, e.g. 181.91 instead of 181.91000366210938
+    """
+    wide = values.astype(np.float64)
+    out = wide.copy()
+    pending = np.isfinite(wide) & (wide != 0)
+    exponent = np.zeros_like(wide)
+    exponent[pending] = np.floor(np.log10(np.abs(wide[pending])))
+    
+    for digits in range(1, 10):
+        if not pending.any():
+            break
+        
+        # Scale by an exact power of ten so the rounded quotient or product
+        # is the correctly rounded float64 of the shorter decimal
+        places = digits - 1 - exponent[pending]
+        scale = 10.0 ** np.abs(places)
+        candidate = np.where(places >= 0, np.round(wide[pending] * scale) / scale, 
+                             np.round(wide[pending] / scale) * scale)
+        
+        hit = candidate.astype(np.float32) == values[pending]
+        matched = np.flatnonzero(pending)[hit]
+        out[matched] = candidate[hit]
+        pending[matched] = False
+    
+    return out
+
 class DBLoader:
     """Loads financial market data into databases."""
     
@@ -27,6 +67,37 @@ class DBLoader:
         self.config = config
         self.connection_string = config.db_connection_string
         self.db_path = config.db_path
+        self.db_type = config.db_type
+        self.chunksize = config.db_chunksize
+        
+        # Build the engine (and its connection pool) once and reuse it
+        self.engine = self._create_engine()
+    
+    def _create_engine(self):
+        """
+        Create a SQLAlchemy engine for the configured database.
+        
+        For SQLite, every new connection is switched to WAL journaling with
+        synchronous=NORMAL, which makes bulk appends far cheaper.
+        
+        Returns:
+            sqlalchemy.engine.Engine: Database engine
+        """
+        if self.db_type != 'sqlite':
+            return create_engine(self.connection_string, pool_pre_ping=True)
+        
+        # Allow the cached engine to be shared across threads
+        engine = create_engine(self.connection_string, pool_pre_ping=True,
+                               connect_args={'check_same_thread': False})
+        
+        @event.listens_for(engine, 'connect')
+        def _set_sqlite_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+            cursor.close()
+        
+        return engine
     
     def load(self, data):
         """
@@ -48,9 +119,6 @@ class DBLoader:
             # Create database directory if it doesn't exist
             os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
             
-            # Create engine based on connection string
-            engine = create_engine(self.connection_string)
-            
             # Determine table name based on data structure
             if 'Symbol' in data.columns and 'Close' in data.columns:
                 table_name = 'stock_prices'
@@ -59,11 +127,19 @@ class DBLoader:
             else:
                 table_name = 'financial_data'
             
-            # Add a timestamp for when this data was loaded
-            data['load_timestamp'] = datetime.now()
+            # Add a timestamp for when this data was loaded, on a copy so the
+            # CSV export running alongside sees the caller's frame unchanged
+            data = data.assign(load_timestamp=datetime.now())
+            data = self._widen_float32(data)
             
             # Load data to database
-            data.to_sql(table_name, engine, if_exists='append', index=False)
+            if self.db_type == 'sqlite':
+                self._load_sqlite(table_name, data)
+            else:
+                # Insert in batches within a single transaction
+                with self.engine.begin() as conn:
+                    data.to_sql(table_name, conn, if_exists='append', index=False,
+                                method='multi', chunksize=self.chunksize)
             
             logger.info(f"Successfully loaded data into {table_name} table")
             
@@ -76,6 +152,89 @@ class DBLoader:
             logger.error(f"Error loading data into database: {str(e)}")
             return False
     
+    def _widen_float32(self, data):
+        """
+        Widen float32 columns to float64 for storage.
+        
+        Each value is widened to its shortest decimal repr, so a price read
+        as 181.91 is stored as 181.91 rather than as the float32 rounding
+        181.91000366210938, and equality queries against source values match.
+        
+        Args:
+            data (pandas.DataFrame): Data to load
+        
+        Returns:
+            pandas.DataFrame: Shallow copy with float32 columns as float64
+        """
+        float32_cols = [col for col in data.columns if data[col].dtype == np.float32]
+        if not float32_cols:
+            return data
+        
+        data = data.copy(deep=False)
+        for col in float32_cols:
+            data[col] = _shortest_float64(data[col].to_numpy())
+        return data
+    
+    def _load_sqlite(self, table_name, data):
+        """
+        Append data to a SQLite table using the sqlite3 driver directly.
+        
+        All rows are inserted with a single executemany inside one explicit
+        transaction, which avoids SQLAlchemy's per-statement overhead.
+        Columns missing from an existing table are added before inserting.
+        
+        Args:
+            table_name (str): Name of the table to append to
+            data (pandas.DataFrame): Data to load
+        """
+        columns = list(data.columns)
+        
+        # sqlite3 only binds Python scalars; timestamps are stored as text in
+        # the same format pandas' to_sql uses, and NaN/NaT bind as NULL
+        values = []
+        for col in columns:
+            series = data[col]
+            if pd.api.types.is_datetime64_any_dtype(series):
+                series = series.dt.strftime('%Y-%m-%d %H:%M:%S.%f')
+            values.append(series.tolist())
+        rows = list(zip(*values))
+        
+        conn = sqlite3.connect(self.db_path, isolation_level=None)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            
+            conn.execute("BEGIN")
+            try:
+                existing = [row[1] for row in conn.execute(f'PRAGMA table_info("{table_name}")')]
+                if not existing:
+                    column_defs = ', '.join(f'"{col}" {self._sqlite_type(data[col])}' for col in columns)
+                    conn.execute(f'CREATE TABLE "{table_name}" ({column_defs})')
+                else:
+                    for col in columns:
+                        if col not in existing:
+                            conn.execute(f'ALTER TABLE "{table_name}" ADD COLUMN "{col}" {self._sqlite_type(data[col])}')
+                
+                column_list = ', '.join(f'"{col}"' for col in columns)
+                placeholders = ', '.join('?' for _ in columns)
+                conn.executemany(f'INSERT INTO "{table_name}" ({column_list}) VALUES ({placeholders})', rows)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        finally:
+            conn.close()
+    
+    def _sqlite_type(self, series):
+        """Map a pandas column to the SQLite column type to declare for it."""
+        if pd.api.types.is_bool_dtype(series) or pd.api.types.is_integer_dtype(series):
+            return 'INTEGER'
+        if pd.api.types.is_float_dtype(series):
+            return 'REAL'
+        if pd.api.types.is_datetime64_any_dtype(series):
+            return 'TIMESTAMP'
+        return 'TEXT'
+    
     def _log_query_examples(self, table_name):
         """Log example queries for the loaded data."""
         if table_name == 'stock_prices':
@@ -103,8 +262,7 @@ class DBLoader:
             pandas.DataFrame: Query results
         """
         try:
-            engine = create_engine(self.connection_string)
-            return pd.read_sql(query, engine)
+            return pd.read_sql(query, self.engine)
         except Exception as e:
             logger.error(f"Error executing query: {str(e)}")
             return None
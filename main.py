@@ -54,24 +54,17 @@ def main():
     config = Config()
     logger.info(f"Using source: {args.source}")
     
-    # Set up data source options
-    data_sources = []
-    if args.source == 'all':
-        data_sources = ['csv', 'json', 'api']
-    else:
-        data_sources = [args.source]
-    
     # Initialize orchestrator
     orchestrator = Orchestrator(config)
     
-    # Run ETL pipeline for each data source
-    for source in data_sources:
-        try:
-            logger.info(f"Processing {source} data source")
-            orchestrator.run_etl(source, stock_symbols=args.symbols, 
-                                start_date=args.start_date, end_date=args.end_date)
-        except Exception as e:
-            logger.error(f"Error processing {source} data source: {str(e)}")
+    # Run ETL pipeline; 'all' runs the three sources in one pipeline run so
+    # their extract and transform branches run concurrently
+    try:
+        logger.info(f"Processing {args.source} data source")
+        orchestrator.run_etl(args.source, stock_symbols=args.symbols, 
+                             start_date=args.start_date, end_date=args.end_date)
+    except Exception as e:
+        logger.error(f"Error processing {args.source} data source: {str(e)}")
     
     logger.info("Financial Market Data ETL Pipeline completed")
 
@@ -7,8 +7,10 @@ Handles task scheduling and execution flow.
 """
 
 import logging
+import time
+import numpy as np
 import pandas as pd
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 
 # Import extractors
 from extractors.csv_extractor import CSVExtractor
@@ -37,68 +39,173 @@ class Task:
         
         Args:
             name (str): Task name
-            func (callable): Function to execute for this task
+            func (callable): Function to execute for this task. It is called
+                with a ``results`` dict holding the output of every task
+                already run in the current pipeline run.
             dependencies (list): List of task names this task depends on
         """
         self.name = name
         self.func = func
         self.dependencies = dependencies or []
-        self.completed = False
-        self.result = None
         
     def execute(self, *args, **kwargs):
         """Execute the task function."""
-        logger.info(f"Executing task: {self.name}")
-        start_time = datetime.now()
+        log_timing = logger.isEnabledFor(logging.INFO)
+        if log_timing:
+            logger.info("Executing task: %s", self.name)
+        start_time = time.perf_counter_ns()
         
         try:
-            self.result = self.func(*args, **kwargs)
-            self.completed = True
-            execution_time = (datetime.now() - start_time).total_seconds()
-            logger.info(f"Task {self.name} completed in {execution_time:.2f} seconds")
-            return self.result
+            result = self.func(*args, **kwargs)
         except Exception as e:
-            logger.error(f"Task {self.name} failed: {str(e)}")
+            logger.error("Task %s failed: %s", self.name, e)
             raise
+        
+        if log_timing:
+            logger.info("Task %s completed in %.2f seconds", self.name, 
+                        (time.perf_counter_ns() - start_time) / 1e9)
+        return result
 
 class SimpleScheduler:
     """Simple task scheduler for the ETL pipeline."""
     
-    def __init__(self):
-        """Initialize the scheduler with an empty task dictionary."""
-        self.tasks = {}
+    def __init__(self, max_workers=1):
+        """
+        Initialize the scheduler with an empty task list.
+        
+        Args:
+            max_workers (int): Maximum number of independent tasks run concurrently
+        """
+        self._tasks = []
+        self._name_to_id = {}
+        self.max_workers = max_workers
+        self._plans = None
+        
+    @property
+    def tasks(self):
+        """dict: Registered tasks keyed by name."""
+        return {task.name: task for task in self._tasks}
         
     def add_task(self, task):
-        """Add a task to the scheduler."""
-        self.tasks[task.name] = task
+        """Add a task to the scheduler, replacing any task with the same name."""
+        task_id = self._name_to_id.get(task.name)
+        if task_id is None:
+            self._name_to_id[task.name] = len(self._tasks)
+            self._tasks.append(task)
+        else:
+            self._tasks[task_id] = task
+        self._plans = None
         
-    def run(self, entry_point, *args, **kwargs):
+    def finalize(self):
+        """
+        Precompute an execution plan for every task.
+        
+        Tasks are identified by integer IDs and their dependencies are kept
+        in CSR form (``indptr``/``indices``). They are layered with Kahn's
+        algorithm: wave k holds the tasks whose dependencies all sit in
+        earlier waves. The plan for each task is those waves restricted to
+        the task and its ancestors.
+        
+        Raises:
+            ValueError: If a dependency is missing or the tasks form a cycle
+        """
+        n = len(self._tasks)
+        dep_ids = []
+        for task in self._tasks:
+            for dep_name in task.dependencies:
+                if dep_name not in self._name_to_id:
+                    raise ValueError(f"Dependency {dep_name} not found")
+            dep_ids.append([self._name_to_id[dep_name] for dep_name in task.dependencies])
+        
+        # Dependencies of task i are indices[indptr[i]:indptr[i + 1]]
+        indptr = np.zeros(n + 1, dtype=np.int32)
+        indptr[1:] = np.cumsum([len(deps) for deps in dep_ids])
+        indices = np.fromiter((dep for deps in dep_ids for dep in deps), dtype=np.int32, count=indptr[-1])
+        
+        # Dependents in the same form, from the reversed edges
+        owners = np.repeat(np.arange(n, dtype=np.int32), np.diff(indptr))
+        order = np.argsort(indices, kind='stable')
+        rev_indices = owners[order]
+        rev_indptr = np.zeros(n + 1, dtype=np.int32)
+        rev_indptr[1:] = np.cumsum(np.bincount(indices, minlength=n))
+        
+        in_degree = np.diff(indptr)
+        waves = []
+        wave = np.flatnonzero(in_degree == 0).tolist()
+        while wave:
+            waves.append(wave)
+            next_wave = []
+            for task_id in wave:
+                for dependent in rev_indices[rev_indptr[task_id]:rev_indptr[task_id + 1]].tolist():
+                    in_degree[dependent] -= 1
+                    if in_degree[dependent] == 0:
+                        next_wave.append(dependent)
+            wave = next_wave
+        
+        if sum(len(wave) for wave in waves) != n:
+            raise ValueError("Task dependencies contain a cycle")
+        
+        # Ancestor sets as bitmasks: a task's own bit plus its dependencies' masks
+        required = [0] * n
+        for wave in waves:
+            for task_id in wave:
+                mask = 1 << task_id
+                for dep in indices[indptr[task_id]:indptr[task_id + 1]].tolist():
+                    mask |= required[dep]
+                required[task_id] = mask
+        
+        plans = []
+        for mask in required:
+            plan = (tuple(i for i in wave if mask >> i & 1) for wave in waves)
+            plans.append(tuple(wave for wave in plan if wave))
+        self._plans = plans
+        
+    def run(self, entry_point, *args, results=None, **kwargs):
         """
         Run tasks starting from the entry point.
         
+        Every task in the entry point's plan whose result is not already in
+        ``results`` is executed in dependency order; tasks in the same wave
+        run concurrently on a thread pool. Pass the same dict to several calls
+        to share results within one pipeline run.
+        
         Args:
             entry_point (str): Name of the entry point task
+            results (dict, optional): Task results from earlier in this run
             *args, **kwargs: Arguments to pass to tasks
         
         Returns:
             The result of the entry point task
         """
-        if entry_point not in self.tasks:
+        if entry_point not in self._name_to_id:
             raise ValueError(f"Task {entry_point} not found")
         
-        task = self.tasks[entry_point]
+        if self._plans is None:
+            self.finalize()
+        
+        if results is None:
+            results = {}
         
-        # Check if dependencies are completed
-        for dep_name in task.dependencies:
-            if dep_name not in self.tasks:
-                raise ValueError(f"Dependency {dep_name} not found")
-            
-            dep_task = self.tasks[dep_name]
-            if not dep_task.completed:
-                self.run(dep_name, *args, **kwargs)
+        pool = None
+        try:
+            for wave in self._plans[self._name_to_id[entry_point]]:
+                pending = [self._tasks[i] for i in wave if self._tasks[i].name not in results]
+                
+                if len(pending) > 1 and self.max_workers > 1:
+                    if pool is None:
+                        pool = ThreadPoolExecutor(max_workers=self.max_workers)
+                    # Tasks in a wave only read results from earlier waves
+                    outputs = list(pool.map(lambda task: task.execute(*args, results=results, **kwargs), pending))
+                else:
+                    outputs = [task.execute(*args, results=results, **kwargs) for task in pending]
+                
+                for task, output in zip(pending, outputs):
+                    results[task.name] = output
+        finally:
+            if pool is not None:
+                pool.shutdown()
         
-        # Execute the task
-        return task.execute(*args, **kwargs)
+        return results[entry_point]
 
 class Orchestrator:
     """Orchestrates the ETL pipeline execution."""
@@ -111,7 +218,7 @@ class Orchestrator:
             config (Config): Configuration object
         """
         self.config = config
-        self.scheduler = SimpleScheduler()
+        self.scheduler = SimpleScheduler(config.scheduler_max_workers)
         
         # Initialize components
         self.csv_extractor = CSVExtractor(config)
@@ -131,49 +238,88 @@ class Orchestrator:
         
     def _setup_tasks(self):
         """Set up tasks for the ETL pipeline."""
-        # Extract tasks - define wrapper functions to handle parameters correctly
-        self.scheduler.add_task(Task("extract_csv", lambda *args, **kwargs: self.csv_extractor.extract()))
-        self.scheduler.add_task(Task("extract_json", lambda *args, **kwargs: self.json_extractor.extract()))
-        self.scheduler.add_task(Task("extract_api", lambda *args, **kwargs: 
-                               self.api_extractor.extract(**{k: kwargs[k] for k in ['symbols', 'start_date', 'end_date'] 
-                                                            if k in kwargs})))
-        
-        # Transform tasks - use wrapper functions to handle parameters correctly
-        self.scheduler.add_task(Task("transform_csv_data", 
-                                    lambda *args, **kwargs: self.transformer.transform_csv_data(args[0] if args else None), 
-                                    ["extract_csv"]))
-        self.scheduler.add_task(Task("transform_json_data", 
-                                    lambda *args, **kwargs: self.transformer.transform_json_data(args[0] if args else None), 
-                                    ["extract_json"]))
-        self.scheduler.add_task(Task("transform_api_data", 
-                                    lambda *args, **kwargs: self.transformer.transform_api_data(args[0] if args else None), 
-                                    ["extract_api"]))
-        
-        # Calculate metrics - use a wrapper to handle multiple dataframes
-        self.scheduler.add_task(Task("calculate_metrics", 
-                                    lambda *args, **kwargs: 
-                                        self.metrics_calculator.calculate(**{k: kwargs[k] for k in kwargs if k in ['csv_data', 'json_data', 'api_data']}), 
+        # Extract tasks
+        self.scheduler.add_task(Task("extract_csv", self._extract_csv))
+        self.scheduler.add_task(Task("extract_json", self._extract_json))
+        self.scheduler.add_task(Task("extract_api", self._extract_api))
+        
+        # Transform tasks
+        self.scheduler.add_task(Task("transform_csv_data", self._transform_csv_data, ["extract_csv"]))
+        self.scheduler.add_task(Task("transform_json_data", self._transform_json_data, ["extract_json"]))
+        self.scheduler.add_task(Task("transform_api_data", self._transform_api_data, ["extract_api"]))
+        
+        # Calculate metrics from all transformed sources
+        self.scheduler.add_task(Task("calculate_metrics", self._calculate_metrics, 
                                     ["transform_csv_data", "transform_json_data", "transform_api_data"]))
         
         # Validate tasks
-        self.scheduler.add_task(Task("validate_data", 
-                                    self.validator.validate, 
-                                    ["calculate_metrics"]))
+        self.scheduler.add_task(Task("validate_data", self._validate_data, ["calculate_metrics"]))
         
         # Load tasks
-        self.scheduler.add_task(Task("load_to_db", 
-                                    self.db_loader.load, 
-                                    ["validate_data"]))
-        self.scheduler.add_task(Task("export_to_csv", 
-                                    self.csv_loader.export, 
-                                    ["validate_data"]))
+        self.scheduler.add_task(Task("load_to_db", self._load_to_db, ["validate_data"]))
+        self.scheduler.add_task(Task("export_to_csv", self._export_to_csv, ["validate_data"]))
+        
+        # Both loads depend only on validate_data, so they run as one wave
+        self.scheduler.add_task(Task("load_all", self._load_all, ["load_to_db", "export_to_csv"]))
+        
+        self.scheduler.finalize()
+    
+    # Task functions - each receives the results of the current run plus the
+    # keyword arguments given to the scheduler
+    def _extract_csv(self, results, **kwargs):
+        """Extract data from the CSV source."""
+        return self.csv_extractor.extract()
+    
+    def _extract_json(self, results, **kwargs):
+        """Extract data from the JSON source."""
+        return self.json_extractor.extract()
+    
+    def _extract_api(self, results, **kwargs):
+        """Extract data from the API for the requested symbols and dates."""
+        return self.api_extractor.extract(symbols=kwargs['symbols'], 
+                                          start_date=kwargs['start_date'], 
+                                          end_date=kwargs['end_date'])
+    
+    def _transform_csv_data(self, results, **kwargs):
+        """Transform the extracted CSV data."""
+        return self.transformer.transform_csv_data(results["extract_csv"])
+    
+    def _transform_json_data(self, results, **kwargs):
+        """Transform the extracted JSON data."""
+        return self.transformer.transform_json_data(results["extract_json"])
+    
+    def _transform_api_data(self, results, **kwargs):
+        """Transform the extracted API data."""
+        return self.transformer.transform_api_data(results["extract_api"])
+    
+    def _calculate_metrics(self, results, **kwargs):
+        """Calculate metrics over every transformed source."""
+        return self.metrics_calculator.calculate(csv_data=results["transform_csv_data"], 
+                                                 json_data=results["transform_json_data"], 
+                                                 api_data=results["transform_api_data"])
+    
+    def _validate_data(self, results, **kwargs):
+        """Validate the calculated metrics."""
+        return self.validator.validate(results["calculate_metrics"])
+    
+    def _load_to_db(self, results, **kwargs):
+        """Load the validated data into the database."""
+        return self.db_loader.load(results["validate_data"])
+    
+    def _export_to_csv(self, results, **kwargs):
+        """Export the validated data to files."""
+        return self.csv_loader.export(results["validate_data"])
+    
+    def _load_all(self, results, **kwargs):
+        """Report whether the database load and the file export both succeeded."""
+        return bool(results["load_to_db"]) and bool(results["export_to_csv"])
     
     def run_etl(self, source, stock_symbols=None, start_date=None, end_date=None):
         """
         Run the ETL pipeline for the specified source.
         
         Args:
-            source (str): Data source ('csv', 'json', or 'api')
+            source (str): Data source ('csv', 'json', 'api', or 'all')
             stock_symbols (str, optional): Comma-separated list of stock symbols
             start_date (str, optional): Start date for historical data
             end_date (str, optional): End date for historical data
@@ -189,37 +335,20 @@ class Orchestrator:
         start = start_date or self.config.default_start_date
         end = end_date or self.config.default_end_date
         
-        # Run appropriate tasks based on source
-        csv_data = pd.DataFrame()
-        json_data = pd.DataFrame()
-        api_data = pd.DataFrame()
-        
-        # Process each source individually to avoid parameter conflicts
-        if source == 'csv' or source == 'all':
-            # For CSV source, don't pass any parameters that the extract_csv task doesn't expect
-            csv_raw = self.scheduler.run("extract_csv")
-            csv_data = self.scheduler.run("transform_csv_data", csv_raw)
-        
-        if source == 'json' or source == 'all':
-            # For JSON source, don't pass any parameters that the extract_json task doesn't expect
-            json_raw = self.scheduler.run("extract_json")
-            json_data = self.scheduler.run("transform_json_data", json_raw)
-        
-        if source == 'api' or source == 'all':
-            # For API source, only pass the parameters the extract_api task expects
-            api_raw = self.scheduler.run("extract_api", symbols=symbols, start_date=start, end_date=end)
-            api_data = self.scheduler.run("transform_api_data", api_raw)
+        # Seed the branches not selected with empty frames so the scheduler
+        # skips their extract/transform tasks
+        results = {}
+        for branch in ['csv', 'json', 'api']:
+            if source != branch and source != 'all':
+                results[f"extract_{branch}"] = pd.DataFrame()
+                results[f"transform_{branch}_data"] = pd.DataFrame()
         
         # Calculate metrics with all available data
-        metrics_data = self.scheduler.run("calculate_metrics", 
-                                        csv_data=csv_data, 
-                                        json_data=json_data, 
-                                        api_data=api_data)
+        metrics_data = self.scheduler.run("calculate_metrics", results=results,
+                                        symbols=symbols, start_date=start, end_date=end)
         
         # Only proceed if we have data
         if not metrics_data.empty:
-            validated_data = self.scheduler.run("validate_data", metrics_data)
-            self.scheduler.run("load_to_db", validated_data)
-            self.scheduler.run("export_to_csv", validated_data)
+            self.scheduler.run("load_all", results=results)
         
         logger.info(f"ETL pipeline for {source} source completed successfully")
@@ -6,21 +6,33 @@ Unit tests for Financial Market ETL pipeline.
 """
 
 import unittest
+import numpy as np
 import pandas as pd
+import io
+import json
 import os
 import logging
+import tempfile
+import threading
+import asyncio
 from datetime import datetime, timedelta
+from unittest import mock
 
 # Import local modules
 from config import Config
 from extractors.csv_extractor import CSVExtractor
 from extractors.json_extractor import JSONExtractor
-from extractors.api_extractor import APIExtractor
+from extractors.api_extractor import APIExtractor, RateLimiter
 from transformers.market_data_transformer import MarketDataTransformer
 from transformers.metrics_calculator import MetricsCalculator
 from validators.data_validator import DataValidator
 from loaders.db_loader import DBLoader
 from loaders.csv_loader import CSVLoader
+import loaders.csv_loader as csv_loader_module
+import transformers.metrics_calculator as metrics_calculator_module
+import validators.data_validator as data_validator_module
+from orchestrator import SimpleScheduler, Task
+from dtypes import narrow_dtypes
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -33,6 +45,11 @@ class TestFinancialMarketETL(unittest.TestCase):
         """Set up test environment."""
         self.config = Config()
         
+        # Keep the API cache and rate limit state out of the data directory
+        scratch_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(scratch_dir.cleanup)
+        self.config.alpha_vantage_rate_limit_file = os.path.join(scratch_dir.name, '.ratelimit.sqlite')
+        
         # Use test data paths to avoid affecting production data
         self.config.stock_prices_csv = os.path.join(self.config.data_dir, 'stock_prices.csv')
         self.config.economic_indicators_json = os.path.join(self.config.data_dir, 'economic_indicators.json')
@@ -41,11 +58,13 @@ class TestFinancialMarketETL(unittest.TestCase):
         self.csv_extractor = CSVExtractor(self.config)
         self.json_extractor = JSONExtractor(self.config)
         self.api_extractor = APIExtractor(self.config)
+        self.addCleanup(self.api_extractor.close)
         self.transformer = MarketDataTransformer(self.config)
         self.metrics_calculator = MetricsCalculator(self.config)
         self.validator = DataValidator(self.config)
         self.db_loader = DBLoader(self.config)
         self.csv_loader = CSVLoader(self.config)
+        self.api_extractor.cache_dir = os.path.join(scratch_dir.name, 'api_cache')
     
     def test_csv_extraction(self):
         """Test CSV data extraction."""
@@ -74,6 +93,18 @@ class TestFinancialMarketETL(unittest.TestCase):
         expected_columns = ['date', 'indicator', 'value', 'unit', 'frequency']
         for col in expected_columns:
             self.assertIn(col, data.columns)
+        
+        # ISO timestamps parse as well as plain dates
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            self.json_extractor.source_file = os.path.join(tmp_dir, 'indicators.json')
+            with open(self.json_extractor.source_file, 'w') as f:
+                json.dump({'indicators': [
+                    {'date': '2024-01-01T00:00:00', 'indicator': 'GDP_Growth', 'value': 2.1},
+                    {'date': '2024-02-01', 'indicator': 'GDP_Growth', 'value': 2.3}
+                ]}, f)
+            data = self.json_extractor.extract()
+        
+        self.assertEqual(data['date'].tolist(), [pd.Timestamp('2024-01-01'), pd.Timestamp('2024-02-01')])
     
     def test_api_extraction(self):
         """Test API data extraction."""
@@ -95,6 +126,103 @@ class TestFinancialMarketETL(unittest.TestCase):
         
         # Assert only requested symbols are present
         self.assertTrue(all(data['Symbol'].isin(test_symbols)))
+        
+        # Assert prices and volumes were narrowed
+        self.assertEqual(data['Close'].dtype, 'float32')
+        self.assertEqual(data['Volume'].dtype, 'int32')
+    
+    def test_api_extraction_fetches_all_symbols(self):
+        """Test API extraction against a stubbed Alpha Vantage response."""
+        payload = {
+            'Time Series (Daily)': {
+                '2024-01-03': {'1. open': '10.0', '2. high': '11.0', '3. low': '9.0',
+                               '4. close': '10.5', '5. volume': '1000'},
+                '2024-01-04': {'1. open': '10.5', '2. high': '12.0', '3. low': '10.0',
+                               '4. close': '11.5', '5. volume': '2000'}
+            }
+        }
+        
+        def fake_get(url, params=None, **kwargs):
+            response = mock.MagicMock(status_code=200)
+            response.raw = io.BytesIO(json.dumps(payload).encode())
+            response.content = json.dumps(payload).encode()
+            response.json.return_value = payload
+            return response
+        
+        self.api_extractor.api_key = 'test'
+        with mock.patch.object(self.api_extractor.session, 'get', side_effect=fake_get) as get:
+            data = self.api_extractor.extract(['AAPL', 'MSFT'], '2024-01-01', '2024-01-31')
+        
+        self.assertEqual(get.call_count, 2)
+        self.assertEqual(len(data), 4)
+        self.assertEqual(sorted(data['Symbol'].unique()), ['AAPL', 'MSFT'])
+        self.assertEqual(data['Close'].max(), 11.5)
+        
+        # A full history fetch covers the range, so the rerun is served from the cache
+        if self.api_extractor.cache_enabled:
+            with mock.patch.object(self.api_extractor.session, 'get', side_effect=fake_get) as get:
+                cached_data = self.api_extractor.extract(['AAPL', 'MSFT'], '2024-01-01', '2024-01-04')
+            
+            get.assert_not_called()
+            self.assertEqual(len(cached_data), 4)
+            
+            # The fetch happened after end_date, so days without bars are not refetched
+            with mock.patch.object(self.api_extractor.session, 'get', side_effect=fake_get) as get:
+                cached_data = self.api_extractor.extract(['AAPL', 'MSFT'], '2024-01-01', '2024-01-15')
+            
+            get.assert_not_called()
+            self.assertEqual(len(cached_data), 4)
+    
+    def test_api_extraction_latest_quotes(self):
+        """Test that latest-only extraction uses a single batch quote request."""
+        latest_day = pd.offsets.BDay().rollback(pd.Timestamp.now().normalize()).strftime('%Y-%m-%d')
+        payload = {
+            'Stock Quotes': [
+                {'1. symbol': 'AAPL', '2. price': '185.59', '3. volume': '83551800',
+                 '4. timestamp': f'{latest_day} 16:00:00'},
+                {'1. symbol': 'MSFT', '2. price': '367.75', '3. volume': '--',
+                 '4. timestamp': f'{latest_day} 16:00:00'}
+            ]
+        }
+        response = mock.Mock(status_code=200, content=json.dumps(payload).encode())
+        response.json.return_value = payload
+        
+        self.api_extractor.api_key = 'test'
+        with mock.patch.object(self.api_extractor.session, 'post', return_value=response) as post, \
+                mock.patch.object(self.api_extractor.session, 'get') as get:
+            data = self.api_extractor.extract(['AAPL', 'MSFT'], latest_day, latest_day)
+        
+        post.assert_called_once()
+        get.assert_not_called()
+        self.assertEqual(list(data['Symbol']), ['AAPL', 'MSFT'])
+        self.assertAlmostEqual(data['Close'].iloc[0], 185.59, places=4)
+        self.assertEqual(data['Open'].iloc[0], data['Close'].iloc[0])
+        
+        # A single day in the past needs the daily series, not today's quote
+        with mock.patch.object(self.api_extractor, '_fetch_batch_quotes') as batch, \
+                mock.patch.object(self.api_extractor, '_extract_async', return_value={}) as daily:
+            self.api_extractor.extract(['AAPL'], '2020-01-02', '2020-01-02')
+        
+        batch.assert_not_called()
+        daily.assert_called_once()
+    
+    def test_rate_limit_shared_across_runs(self):
+        """Test that the persisted token bucket carries over between limiter instances."""
+        state_path = self.config.alpha_vantage_rate_limit_file
+        
+        first_run = RateLimiter(2, 60, state_path=state_path, key='test')
+        self.assertEqual(first_run._take_token(), 0)
+        self.assertEqual(first_run._take_token(), 0)
+        
+        second_run = RateLimiter(2, 60, state_path=state_path, key='test')
+        self.assertGreater(second_run._take_token(), 0)
+        
+        other_key = RateLimiter(2, 60, state_path=state_path, key='other')
+        self.assertEqual(other_key._take_token(), 0)
+        
+        # The async path takes tokens from the same bucket
+        asyncio.run(other_key.acquire())
+        self.assertGreater(other_key._take_token(), 0)
     
     def test_transformation(self):
         """Test data transformation."""
@@ -109,6 +237,15 @@ class TestFinancialMarketETL(unittest.TestCase):
         # Assert source column was added
         self.assertIn('Source', transformed_data.columns)
         self.assertEqual(transformed_data['Source'].iloc[0], 'CSV')
+        
+        # The extracted frame is left untouched
+        self.assertNotIn('Source', data.columns)
+        
+        # Bad or mixed-format dates are rejected rather than filled from the previous row
+        for dates in (['2024-01-03', '2024-01-04', '2024-13-05'], ['2024-01-03', '01/04/2024', '2024-01-05']):
+            bad_data = data.head(3).assign(Date=dates)
+            with self.assertRaises(ValueError):
+                self.transformer.transform_csv_data(bad_data)
     
     def test_metrics_calculation(self):
         """Test metrics calculation."""
@@ -128,6 +265,54 @@ class TestFinancialMarketETL(unittest.TestCase):
         for col in metric_columns:
             self.assertIn(col, metrics_data.columns)
     
+    def test_metrics_calculation_parallel(self):
+        """Test metrics computed in worker processes match the serial result."""
+        symbols = ['AAPL', 'MSFT', 'GOOGL', 'AMZN', 'META']
+        data = self.api_extractor._create_mock_api_data(symbols, '2023-01-01', '2023-12-31')
+        transformed_data = self.transformer.transform_api_data(data)
+        
+        self.metrics_calculator.parallel_min_symbols = 0
+        serial = self.metrics_calculator.calculate(api_data=transformed_data)
+        
+        self.metrics_calculator.parallel_min_symbols = 2
+        self.metrics_calculator.parallel_max_workers = 2
+        parallel = self.metrics_calculator.calculate(api_data=transformed_data)
+        
+        pd.testing.assert_frame_equal(parallel, serial)
+    
+    def test_rsi_uses_wilder_smoothing(self):
+        """Test RSI seeding and smoothing on hand-checkable price paths."""
+        dates = pd.date_range('2024-01-01', periods=30, freq='B')
+        zigzag = 100 + (np.arange(30) % 2)  # alternating +1/-1 changes
+        rising = 100 + np.arange(30, dtype=float)
+        data = pd.DataFrame({
+            'Date': np.tile(dates, 2),
+            'Symbol': np.repeat(['ZIG', 'UP'], 30),
+            'Open': np.r_[zigzag, rising], 'High': np.r_[zigzag, rising],
+            'Low': np.r_[zigzag, rising], 'Close': np.r_[zigzag, rising].astype(float),
+            'Volume': 1000
+        })
+        
+        window = self.config.rsi_window
+        
+        # The compiled kernel (when numba is installed) and the vectorized
+        # pandas fallback must agree
+        for rsi_func in {metrics_calculator_module._wilder_rsi, metrics_calculator_module._wilder_rsi_pandas}:
+            with mock.patch.object(metrics_calculator_module, '_wilder_rsi', rsi_func):
+                metrics_data = self.metrics_calculator.calculate(data)
+            
+            zig_rsi = metrics_data.loc[metrics_data['Symbol'] == 'ZIG', 'RSI'].to_numpy()
+            self.assertTrue(np.isnan(zig_rsi[:window]).all())
+            self.assertAlmostEqual(zig_rsi[window], 50.0, places=4)
+            
+            # avg_gain and avg_loss both start at 0.5; the next change is a gain
+            expected_gain = (0.5 * (window - 1) + 1) / window
+            expected_loss = (0.5 * (window - 1)) / window
+            self.assertAlmostEqual(zig_rsi[window + 1], 100 - 100 / (1 + expected_gain / expected_loss), places=4)
+            
+            up_rsi = metrics_data.loc[metrics_data['Symbol'] == 'UP', 'RSI'].to_numpy()
+            self.assertTrue((up_rsi[window:] == 100).all())
+    
     def test_validation(self):
         """Test data validation."""
         # Extract, transform, calculate metrics, and validate
@@ -144,6 +329,271 @@ class TestFinancialMarketETL(unittest.TestCase):
         key_columns = ['Date', 'Symbol', 'Open', 'High', 'Low', 'Close']
         for col in key_columns:
             self.assertEqual(validated_data[col].isnull().sum(), 0)
+    
+    def test_validation_fixes_price_relationships(self):
+        """Test out-of-range prices, inconsistent OHLC rows and negative volumes are repaired."""
+        data = pd.DataFrame({
+            'Date': pd.date_range('2024-01-01', periods=3, freq='B'),
+            'Symbol': ['AAPL', 'AAPL', 'AAPL'],
+            'Open': [10.0, 11.0, 12.0],
+            'High': [10.5, 10.0, 12.5],  # second row: High below Open
+            'Low': [9.5, 13.0, 11.5],    # second row: Low above High
+            'Close': [10.2, 12.0, 0.0],  # third row: out-of-range close
+            'Volume': [1000, -5, 1200]
+        })
+        
+        # The compiled kernel (when numba is installed) and the pandas
+        # fallback must repair the data the same way
+        for kernel in {data_validator_module.clean_prices, None}:
+            with mock.patch.object(data_validator_module, 'clean_prices', kernel):
+                validated_data = self.validator.validate(data)
+            
+            # Prices are validated as float32
+            np.testing.assert_array_equal(validated_data['Close'], np.float32([10.2, 12.0, 12.0]))
+            np.testing.assert_array_equal(validated_data['High'], np.float32([10.5, 13.0, 12.5]))
+            np.testing.assert_array_equal(validated_data['Low'], np.float32([9.5, 10.0, 11.5]))
+            self.assertEqual(validated_data['Volume'].tolist(), [1000, 0, 1200])
+            self.assertIsInstance(validated_data['Symbol'].dtype, pd.CategoricalDtype)
+            self.assertEqual(data['High'].iloc[1], 10.0)
+    
+    def test_validation_skips_repair_for_clean_prices(self):
+        """Test prices that are present, in range and consistent skip the repair pass."""
+        data = pd.DataFrame({
+            'Date': pd.date_range('2024-01-01', periods=3, freq='B'),
+            'Symbol': ['AAPL', 'AAPL', 'AAPL'],
+            'Open': [10.0, 11.0, 12.0],
+            'High': [10.5, 11.5, 12.5],
+            'Low': [9.5, 10.5, 11.5],
+            'Close': [10.2, 11.2, 12.2],
+            'Volume': [1000, 1100, 1200]
+        })
+        
+        with mock.patch.object(data_validator_module, 'clean_prices') as compiled, \
+                mock.patch.object(self.validator, '_clean_prices_numpy') as fallback:
+            validated_data = self.validator.validate(data)
+        
+        compiled.assert_not_called()
+        fallback.assert_not_called()
+        np.testing.assert_array_equal(validated_data['High'], np.float32(data['High']))
+    
+    def test_validation_bounds_gap_filling(self):
+        """Test missing runs longer than max_fill_gap are only filled that far from each side."""
+        close = [10.0, np.nan, np.nan, np.nan, np.nan, 11.0]
+        data = pd.DataFrame({
+            'Date': pd.date_range('2024-01-01', periods=6, freq='B'),
+            'Symbol': ['AAPL'] * 6,
+            'Open': close,
+            'High': close,
+            'Low': close,
+            'Close': close,
+            'Volume': [1000] * 6
+        })
+        self.validator.max_fill_gap = 1
+        
+        validated_data = self.validator.validate(data)
+        
+        np.testing.assert_array_equal(validated_data['Close'], 
+                                      np.float32([10.0, 10.0, np.nan, np.nan, 11.0, 11.0]))
+        np.testing.assert_array_equal(validated_data['High'], validated_data['Close'])
+    
+    def test_validation_in_chunks(self):
+        """Test chunked validation carries forward fills across chunk boundaries."""
+        data = self.transformer.transform_csv_data(self.csv_extractor.extract())
+        data = data.sort_values(['Symbol', 'Date'], ignore_index=True)
+        data.loc[5, 'Close'] = np.nan  # first row of the second chunk
+        
+        chunks = list(self.validator.validate_iter([data.iloc[:5], data.iloc[5:10], data.iloc[10:]]))
+        
+        self.assertEqual([len(chunk) for chunk in chunks], [5, 5, len(data) - 10])
+        self.assertEqual(chunks[1]['Close'].iloc[0], chunks[0]['Close'].iloc[-1])
+        pd.testing.assert_frame_equal(pd.concat(chunks), self.validator.validate(data))
+        
+        # An extreme return in one chunk does not change the other's columns
+        data = self.metrics_calculator.calculate(data).iloc[:10].copy()
+        data.loc[7, 'Daily_Return'] = 0.9
+        
+        chunks = list(self.validator.validate_iter([data.iloc[:5], data.iloc[5:]]))
+        
+        self.assertEqual(list(chunks[0].columns), list(chunks[1].columns))
+        self.assertEqual(chunks[0]['Extreme_Return_Flag'].sum(), 0)
+        self.assertEqual(chunks[1]['Extreme_Return_Flag'].tolist(), [False, False, True, False, False])
+    
+    def test_economic_validation(self):
+        """Test economic indicator gaps are filled and out-of-range values replaced."""
+        data = self.transformer.transform_json_data(self.json_extractor.extract())
+        data.loc[1, 'Interest_Rate'] = np.nan
+        data.loc[2, 'GDP_Growth'] = 40.0      # above the 15% ceiling
+        data.loc[1, 'Unemployment_Rate'] = -1.0  # below zero
+        
+        validated_data = self.validator.validate(data)
+        
+        self.assertFalse(validated_data.isna().any().any())
+        self.assertEqual(validated_data['Interest_Rate'].iloc[1], data['Interest_Rate'].iloc[0])
+        self.assertEqual(validated_data['GDP_Growth'].iloc[2], data['GDP_Growth'].iloc[1])
+        self.assertEqual(validated_data['Unemployment_Rate'].iloc[1], data['Unemployment_Rate'].iloc[0])
+        self.assertTrue(np.isnan(data.loc[1, 'Interest_Rate']))
+    
+    def test_validation_cache(self):
+        """Test unchanged frames are served from the validation cache."""
+        data = self.transformer.transform_csv_data(self.csv_extractor.extract())
+        self.validator.cache_enabled = True
+        self.validator.cache_size = 1
+        
+        first = self.validator.validate(data)
+        first['Extra'] = 1.0
+        with mock.patch.object(self.validator, '_fill_missing') as fill:
+            second = self.validator.validate(data.copy())
+        fill.assert_not_called()
+        pd.testing.assert_frame_equal(second, first.drop(columns='Extra'))
+        
+        # Changed contents miss the cache and evict the older entry
+        changed = data.copy()
+        changed.loc[changed.index[0], 'Close'] += 1.0
+        self.validator.validate(changed)
+        self.assertEqual(len(self.validator._cache), 1)
+        self.assertNotIn(self.validator._cache_key(data), self.validator._cache)
+        
+        # Changed settings miss the cache too
+        self.validator.min_price = 1000.0
+        with mock.patch.object(self.validator, '_fill_missing', wraps=self.validator._fill_missing) as fill:
+            self.validator.validate(changed)
+        fill.assert_called_once()
+        
+        # Chunked validation never fills the cache
+        self.validator._cache.clear()
+        list(self.validator.validate_iter([data.iloc[:5], data.iloc[5:]]))
+        self.assertEqual(len(self.validator._cache), 0)
+    
+    def test_csv_export(self):
+        """Test CSV export writes one file per symbol plus a consolidated file."""
+        data = self.csv_extractor.extract()
+        transformed_data = self.transformer.transform_csv_data(data)
+        
+        with tempfile.TemporaryDirectory() as output_dir:
+            self.csv_loader.output_dir = output_dir
+            self.csv_loader.emit_csv = True
+            self.assertTrue(self.csv_loader.export(transformed_data))
+            
+            files = os.listdir(output_dir)
+            for symbol in transformed_data['Symbol'].unique():
+                self.assertTrue(any(f.startswith(f"{symbol}_prices_") for f in files))
+            
+            consolidated = [f for f in files if f.startswith('all_stock_prices_') and f.endswith('.csv')]
+            self.assertEqual(len(consolidated), 1)
+            exported = pd.read_csv(os.path.join(output_dir, consolidated[0]))
+            self.assertEqual(len(exported), len(transformed_data))
+            
+            # Dates as plain days, strings unquoted, as DataFrame.to_csv writes them
+            with open(os.path.join(output_dir, consolidated[0])) as f:
+                header, first_line = f.readline(), f.readline()
+            self.assertEqual(header.strip(), ','.join(transformed_data.columns))
+            self.assertEqual(first_line.strip(), '2024-01-03,AAPL,182.15,184.25,180.88,181.91,64606700,CSV')
+    
+    @unittest.skipIf(csv_loader_module.pa is None, "pyarrow is not installed")
+    def test_parquet_export(self):
+        """Test that stock prices are consolidated into a single Parquet file by default."""
+        data = self.csv_extractor.extract()
+        transformed_data = self.transformer.transform_csv_data(data)
+        
+        with tempfile.TemporaryDirectory() as output_dir:
+            self.csv_loader.output_dir = output_dir
+            self.assertTrue(self.csv_loader.export(transformed_data))
+            
+            files = os.listdir(output_dir)
+            self.assertEqual(len(files), 1)
+            self.assertTrue(files[0].endswith('.parquet'))
+            exported = pd.read_parquet(os.path.join(output_dir, files[0]))
+            self.assertEqual(len(exported), len(transformed_data))
+    
+    def test_db_load(self):
+        """Test loading data into a SQLite database."""
+        data = self.csv_extractor.extract()
+        transformed_data = self.transformer.transform_csv_data(data)
+        
+        with tempfile.TemporaryDirectory() as db_dir:
+            self.config.db_path = os.path.join(db_dir, 'test.db')
+            self.config.db_connection_string = f"sqlite:///{self.config.db_path}"
+            db_loader = DBLoader(self.config)
+            
+            self.assertTrue(db_loader.load(transformed_data))
+            result = db_loader.query_data("SELECT COUNT(*) AS n, SUM(Close) AS total FROM stock_prices")
+            self.assertEqual(result['n'].iloc[0], len(transformed_data))
+            self.assertAlmostEqual(result['total'].iloc[0], transformed_data['Close'].astype(np.float64).sum(), places=4)
+            
+            # float32 prices are stored as the source values, not their float32 rounding
+            result = db_loader.query_data("SELECT COUNT(*) AS n FROM stock_prices WHERE Close = 181.91")
+            self.assertEqual(result['n'].iloc[0], (data['Close'] == 181.91).sum())
+            
+            # Appending a frame with an extra column extends the table
+            api_data = self.transformer.transform_api_data(transformed_data.drop(columns=['Source']))
+            self.assertTrue(db_loader.load(api_data))
+            result = db_loader.query_data("SELECT COUNT(Adj_Close) AS n FROM stock_prices")
+            self.assertEqual(result['n'].iloc[0], len(api_data))
+            
+            db_loader.engine.dispose()
+
+    def test_narrow_dtypes(self):
+        """Test narrowing skips narrow columns and keeps Volume that cannot be int32."""
+        data = pd.DataFrame({
+            'Close': np.float32([10.5, 11.0, 11.5]),
+            'RSI': [40.0, 50.0, 60.0],
+            'Volume': [1000.0, np.nan, 3000.0]
+        })
+        
+        with mock.patch.object(pd.Series, 'astype', side_effect=AssertionError) as astype:
+            narrow_dtypes(data, ['Close'])
+        astype.assert_not_called()
+        
+        narrow_dtypes(data)
+        self.assertEqual(data['RSI'].dtype, np.float32)
+        self.assertEqual(data['Volume'].dtype, np.float64)
+        
+        data['Volume'] = [1000.0, 2000.0, 2.0 ** 40]
+        narrow_dtypes(data)
+        self.assertEqual(data['Volume'].dtype, np.float64)
+        
+        data['Volume'] = [1000.0, 2000.0, 3000.0]
+        narrow_dtypes(data)
+        self.assertEqual(data['Volume'].dtype, np.int32)
+    
+    def test_scheduler_runs_plan_once_per_run(self):
+        """Test the scheduler runs each task once per run and keeps no state between runs."""
+        calls = []
+        
+        def make_task(name, value, dependencies=None):
+            def func(results, **kwargs):
+                calls.append(name)
+                return value + sum(results[dep] for dep in dependencies or [])
+            return Task(name, func, dependencies)
+        
+        scheduler = SimpleScheduler(max_workers=2)
+        scheduler.add_task(make_task("sink", 100, ["left", "right"]))
+        scheduler.add_task(make_task("left", 10, ["source"]))
+        scheduler.add_task(make_task("right", 20, ["source"]))
+        scheduler.add_task(make_task("source", 1))
+        scheduler.finalize()
+        
+        for _ in range(2):
+            calls.clear()
+            self.assertEqual(scheduler.run("sink"), 132)
+            self.assertEqual(sorted(calls), ["left", "right", "sink", "source"])
+            self.assertEqual(calls[0], "source")
+        
+        # Seeded results are reused rather than recomputed
+        calls.clear()
+        self.assertEqual(scheduler.run("left", results={"source": 5}), 15)
+        self.assertEqual(calls, ["left"])
+        
+        # Independent tasks in the same wave run concurrently
+        barrier = threading.Barrier(2, timeout=5)
+        scheduler.add_task(Task("left", lambda results, **kwargs: barrier.wait(), ["source"]))
+        scheduler.add_task(Task("right", lambda results, **kwargs: barrier.wait(), ["source"]))
+        scheduler.add_task(Task("sink", lambda results, **kwargs: results["left"] + results["right"], ["left", "right"]))
+        self.assertEqual(scheduler.run("sink"), 1)
+        
+        scheduler.add_task(make_task("source", 1, ["sink"]))
+        with self.assertRaises(ValueError):
+            scheduler.finalize()
 
 if __name__ == '__main__':
     unittest.main()
@@ -8,6 +8,9 @@ Market Data Transformer module for processing and transforming financial market
 import logging
 import pandas as pd
 import numpy as np
+from datetime import datetime
+
+from dtypes import PRICE_COLUMNS, narrow_dtypes
 
 logger = logging.getLogger(__name__)
 
@@ -40,18 +43,20 @@ class MarketDataTransformer:
         logger.info("Transforming CSV data")
         
         try:
-            # Make a copy to avoid modifying the original data
-            df = data.copy()
+            # Shallow copy: the caller's frame is left untouched, but column
+            # buffers are shared until a column is replaced
+            df = data.copy(deep=False)
             
             # Ensure date column is datetime
             if 'Date' in df.columns:
-                df['Date'] = pd.to_datetime(df['Date'])
+                df['Date'] = self._parse_dates(df['Date'])
             
             # Ensure numeric columns are float
             numeric_cols = ['Open', 'High', 'Low', 'Close', 'Volume']
             for col in numeric_cols:
-                if col in df.columns:
+                if col in df.columns and not pd.api.types.is_numeric_dtype(df[col]):
                     df[col] = pd.to_numeric(df[col], errors='coerce')
+            self._downcast_prices(df)
             
             # Fill missing values with forward fill
             df = df.ffill()
@@ -59,6 +64,10 @@ class MarketDataTransformer:
             # Add source column
             df['Source'] = 'CSV'
             
+            # Low-cardinality labels are stored as categoricals
+            df['Symbol'] = df['Symbol'].astype('category')
+            df['Source'] = df['Source'].astype('category')
+            
             # Sort by date and symbol
             df.sort_values(['Symbol', 'Date'], inplace=True)
             
@@ -86,23 +95,23 @@ class MarketDataTransformer:
         logger.info("Transforming JSON data")
         
         try:
-            # Make a copy to avoid modifying the original data
-            df = data.copy()
+            # Shallow copy: the caller's frame is left untouched, but column
+            # buffers are shared until a column is replaced
+            df = data.copy(deep=False)
             
             # Ensure date column is datetime
             if 'date' in df.columns:
-                df['date'] = pd.to_datetime(df['date'])
+                df['date'] = self._parse_dates(df['date'])
                 df.rename(columns={'date': 'Date'}, inplace=True)
             
             # Pivot the data to have indicators as columns
             if 'indicator' in df.columns and 'value' in df.columns:
-                # Create pivot table with indicators as columns
-                pivot_df = df.pivot_table(
-                    index='Date', 
-                    columns='indicator', 
-                    values='value',
-                    aggfunc='first'
-                ).reset_index()
+                # Keep the first non-null value per (Date, indicator) and pivot
+                # directly instead of going through pivot_table's aggregation
+                pivot_df = (df.dropna(subset=['value'])
+                              .drop_duplicates(['Date', 'indicator'])
+                              .pivot(index='Date', columns='indicator', values='value')
+                              .reset_index())
                 
                 # Rename columns to be more readable
                 pivot_df.columns.name = None
@@ -110,7 +119,7 @@ class MarketDataTransformer:
                 pivot_df = df
             
             # Add source column
-            pivot_df['Source'] = 'JSON'
+            pivot_df['Source'] = pd.Categorical(['JSON'] * len(pivot_df))
             
             # Sort by date
             pivot_df.sort_values('Date', inplace=True)
@@ -139,18 +148,20 @@ class MarketDataTransformer:
         logger.info("Transforming API data")
         
         try:
-            # Make a copy to avoid modifying the original data
-            df = data.copy()
+            # Shallow copy: the caller's frame is left untouched, but column
+            # buffers are shared until a column is replaced
+            df = data.copy(deep=False)
             
             # Ensure date column is datetime
             if 'Date' in df.columns:
-                df['Date'] = pd.to_datetime(df['Date'])
+                df['Date'] = self._parse_dates(df['Date'])
             
             # Ensure numeric columns are float
             numeric_cols = ['Open', 'High', 'Low', 'Close', 'Volume']
             for col in numeric_cols:
-                if col in df.columns:
+                if col in df.columns and not pd.api.types.is_numeric_dtype(df[col]):
                     df[col] = pd.to_numeric(df[col], errors='coerce')
+            self._downcast_prices(df)
             
             # Calculate adjusted close if not present (in real data often available)
             if 'Close' in df.columns and 'Adj_Close' not in df.columns:
@@ -160,6 +171,10 @@ class MarketDataTransformer:
             if 'Source' not in df.columns:
                 df['Source'] = 'API'
             
+            # Low-cardinality labels are stored as categoricals
+            df['Symbol'] = df['Symbol'].astype('category')
+            df['Source'] = df['Source'].astype('category')
+            
             # Sort by date and symbol
             df.sort_values(['Symbol', 'Date'], inplace=True)
             
@@ -170,6 +185,45 @@ class MarketDataTransformer:
             logger.error(f"Error transforming API data: {str(e)}")
             raise
     
+    def _parse_dates(self, dates):
+        """
+        Convert a date column to datetime64, skipping columns that already are.
+        
+        The format is detected once from the first value: plain ``YYYY-MM-DD``
+        strings use that format directly and anything else lets pandas infer
+        a single format for the whole column. Values that do not match the
+        format raise, rather than becoming NaT that a later fill would hide.
+        
+        Args:
+            dates (pandas.Series): Date column
+        
+        Returns:
+            pandas.Series: Dates as datetime64
+        """
+        if pd.api.types.is_datetime64_any_dtype(dates):
+            return dates
+        
+        sample = dates.dropna()
+        date_format = None
+        if len(sample) > 0:
+            try:
+                datetime.strptime(str(sample.iat[0]), '%Y-%m-%d')
+                date_format = '%Y-%m-%d'
+            except ValueError:
+                pass
+        
+        return pd.to_datetime(dates, format=date_format, cache=True)
+    
+    def _downcast_prices(self, df):
+        """
+        Store the OHLC price columns as float32 when enabled in the config.
+        
+        Args:
+            df (pandas.DataFrame): Frame to update in place
+        """
+        if self.config.use_float32:
+            narrow_dtypes(df, PRICE_COLUMNS, volume=False)
+    
     def merge_dataframes(self, dfs):
         """
         Merge multiple dataframes into one.
@@ -193,8 +247,12 @@ class MarketDataTransformer:
             # Concatenate all dataframes
             merged_df = pd.concat(valid_dfs, ignore_index=True)
             
-            # Remove duplicates
-            merged_df.drop_duplicates(subset=['Date', 'Symbol'], keep='first', inplace=True)
+            # Remove duplicates on an exact integer (Date, Symbol) key built
+            # from the factorized codes rather than hashing row tuples
+            date_codes, unique_dates = pd.factorize(merged_df['Date'], use_na_sentinel=False)
+            symbol_codes, unique_symbols = pd.factorize(merged_df['Symbol'], use_na_sentinel=False)
+            key = date_codes.astype(np.int64) * len(unique_symbols) + symbol_codes
+            merged_df = merged_df[~pd.Index(key).duplicated(keep='first')]
             
             logger.info(f"Merged dataframe has {len(merged_df)} rows")
             return merged_df
@@ -6,11 +6,147 @@ Metrics Calculator module for computing financial metrics and indicators.
 """
 
 import logging
+import multiprocessing
+import os
 import pandas as pd
 import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    from numba import njit
+except ImportError:  # pragma: no cover - numba is optional
+    njit = None
+
+from dtypes import narrow_dtypes
 
 logger = logging.getLogger(__name__)
 
+def _wilder_rsi(close, group_starts, window):
+    """
+    Compute Wilder's RSI for consecutive groups of a close price array.
+    
+    The first average gain/loss of each group is the simple mean of its
+    first ``window`` price changes; after that each average is smoothed with
+    Wilder's recurrence ``avg = (avg * (window - 1) + x) / window``.
+    
+    Args:
+        close (numpy.ndarray): float64 close prices, grouped contiguously
+        group_starts (numpy.ndarray): int64 start offset of each group
+        window (int): RSI period
+    
+    Returns:
+        numpy.ndarray: RSI values, NaN until a group has ``window`` changes
+    """
+    n = close.shape[0]
+    rsi = np.full(n, np.nan)
+    
+    # Split the price changes into gains and losses in one vectorized pass;
+    # fmax maps NaN changes to zero. gain[i - 1] is the gain into row i.
+    delta = np.diff(close)
+    gains = np.fmax(delta, 0.0)
+    losses = np.fmax(-delta, 0.0)
+    
+    for g in range(group_starts.shape[0]):
+        start = group_starts[g]
+        end = group_starts[g + 1] if g + 1 < group_starts.shape[0] else n
+        if end - start <= window:
+            continue
+        
+        avg_gain = 0.0
+        avg_loss = 0.0
+        for i in range(start + 1, end):
+            gain = gains[i - 1]
+            loss = losses[i - 1]
+            
+            offset = i - start
+            if offset <= window:
+                # Seed with the simple average of the first `window` changes
+                avg_gain += gain / window
+                avg_loss += loss / window
+                if offset < window:
+                    continue
+            else:
+                avg_gain = (avg_gain * (window - 1) + gain) / window
+                avg_loss = (avg_loss * (window - 1) + loss) / window
+            
+            if avg_loss == 0:
+                rsi[i] = 100.0
+            else:
+                rsi[i] = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+    
+    return rsi
+
+def _wilder_rsi_pandas(close, group_starts, window):
+    """
+    Vectorized equivalent of ``_wilder_rsi`` for when numba is not installed.
+    
+    Wilder's recurrence is an exponential average with ``alpha = 1 / window``
+    and ``adjust=False``, so each group's averages are seeded with the SMA of
+    its first ``window`` changes and then smoothed with a grouped ``ewm``.
+    
+    Args:
+        close (numpy.ndarray): float64 close prices, grouped contiguously
+        group_starts (numpy.ndarray): int64 start offset of each group
+        window (int): RSI period
+    
+    Returns:
+        numpy.ndarray: RSI values, NaN until a group has ``window`` changes
+    """
+    n = close.shape[0]
+    rsi = np.full(n, np.nan)
+    if n == 0:
+        return rsi
+    
+    # Change into each row; none into the first row of a group
+    delta = np.empty(n)
+    delta[0] = 0.0
+    delta[1:] = np.diff(close)
+    delta[group_starts] = 0.0
+    group_ends = np.append(group_starts[1:], n)
+    codes = np.repeat(np.arange(len(group_starts)), group_ends - group_starts)
+    
+    # Each group's first average lands on the row `window` changes in
+    seed_rows = group_starts + window
+    has_seed = seed_rows < group_ends
+    seed_rows = seed_rows[has_seed]
+    if len(seed_rows) == 0:
+        return rsi
+    
+    offsets = np.arange(n) - group_starts[codes]
+    averages = []
+    for changes in (np.fmax(delta, 0.0), np.fmax(-delta, 0.0)):
+        # Seed with the simple average of the first `window` changes
+        totals = np.cumsum(changes)
+        values = np.where(offsets > window, changes, np.nan)
+        values[seed_rows] = (totals[seed_rows] - totals[group_starts[has_seed]]) / window
+        
+        smoothed = (pd.Series(values).groupby(codes, sort=False)
+                    .ewm(alpha=1.0 / window, adjust=False).mean())
+        averages.append(smoothed.to_numpy())
+    
+    avg_gain, avg_loss = averages
+    valid = offsets >= window
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rsi[valid] = np.where(avg_loss[valid] == 0, 100.0, 
+                              100.0 - 100.0 / (1.0 + avg_gain[valid] / avg_loss[valid]))
+    return rsi
+
+if njit is not None:
+    _wilder_rsi = njit(cache=True)(_wilder_rsi)
+else:  # pragma: no cover - numba is optional
+    _wilder_rsi = _wilder_rsi_pandas
+
+def _symbol_codes(symbols):
+    """Return integer codes identifying each row's symbol."""
+    # Categorical codes avoid materializing an object array of strings
+    if isinstance(symbols.dtype, pd.CategoricalDtype):
+        return symbols.cat.codes.to_numpy()
+    return pd.factorize(symbols)[0]
+
+def _group_starts(codes):
+    """Return the int64 start offset of each run of equal, contiguous symbol codes."""
+    return np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]]).astype(np.int64)
+
 class MetricsCalculator:
     """Calculates financial metrics from transformed market data."""
     
@@ -24,7 +160,18 @@ class MetricsCalculator:
         self.config = config
         self.short_window = config.ma_short_window
         self.long_window = config.ma_long_window
+        self.ma_short_col = f'MA_{self.short_window}'
+        self.ma_long_col = f'MA_{self.long_window}'
         self.volatility_window = config.volatility_window
+        self.rsi_window = config.rsi_window
+        self.bollinger_window = config.bollinger_window
+        self.use_float32 = config.use_float32
+        self.parallel_min_symbols = config.metrics_parallel_min_symbols
+        self.parallel_max_workers = config.metrics_max_workers
+        
+        # Compile the RSI kernel now rather than on the first real batch
+        if njit is not None:
+            _wilder_rsi(np.zeros(2), np.zeros(1, dtype=np.int64), 1)
     
     def calculate(self, csv_data=None, json_data=None, api_data=None):
         """
@@ -51,89 +198,56 @@ class MetricsCalculator:
             logger.warning("No data to calculate metrics")
             return pd.DataFrame()
             
-        # Combine all available dataframes
-        data = pd.concat(dfs, ignore_index=True) if dfs else pd.DataFrame()
+        # Combine all available dataframes; a single source needs no concat,
+        # only a shallow copy so the caller's frame is left untouched
+        if len(dfs) == 1:
+            data = dfs[0].copy(deep=False)
+        else:
+            data = pd.concat(dfs, ignore_index=True)
         
         logger.info("Calculating financial metrics")
         
         try:
-            # Make a copy to avoid modifying the original data
-            df = data.copy()
+            df = data
             
             # Check if this is stock price data (has Symbol, Open, Close, etc.)
             if 'Symbol' in df.columns and 'Close' in df.columns:
-                # Group by symbol to calculate metrics for each stock
-                symbols = df['Symbol'].unique()
-                result_dfs = []
-                
-                for symbol in symbols:
-                    symbol_df = df[df['Symbol'] == symbol].copy()
-                    
-                    # Sort by date
-                    symbol_df.sort_values('Date', inplace=True)
-                    
-                    # Calculate returns
-                    symbol_df['Daily_Return'] = symbol_df['Close'].pct_change()
-                    
-                    # Calculate moving averages
-                    symbol_df[f'MA_{self.short_window}'] = symbol_df['Close'].rolling(window=self.short_window).mean()
-                    symbol_df[f'MA_{self.long_window}'] = symbol_df['Close'].rolling(window=self.long_window).mean()
-                    
-                    # Calculate moving average crossover signal
-                    symbol_df['MA_Signal'] = 0
-                    symbol_df.loc[symbol_df[f'MA_{self.short_window}'] > symbol_df[f'MA_{self.long_window}'], 'MA_Signal'] = 1
-                    symbol_df.loc[symbol_df[f'MA_{self.short_window}'] < symbol_df[f'MA_{self.long_window}'], 'MA_Signal'] = -1
-                    
-                    # Calculate volatility (standard deviation of returns)
-                    symbol_df['Volatility'] = symbol_df['Daily_Return'].rolling(window=self.volatility_window).std() * np.sqrt(252)  # Annualized
-                    
-                    # Calculate Relative Strength Index (RSI)
-                    delta = symbol_df['Close'].diff()
-                    gain = delta.where(delta > 0, 0)
-                    loss = -delta.where(delta < 0, 0)
-                    
-                    avg_gain = gain.rolling(window=14).mean()
-                    avg_loss = loss.rolling(window=14).mean()
-                    
-                    rs = avg_gain / avg_loss
-                    symbol_df['RSI'] = 100 - (100 / (1 + rs))
-                    
-                    # Calculate Bollinger Bands
-                    symbol_df['BB_Middle'] = symbol_df['Close'].rolling(window=20).mean()
-                    symbol_df['BB_Std'] = symbol_df['Close'].rolling(window=20).std()
-                    symbol_df['BB_Upper'] = symbol_df['BB_Middle'] + (symbol_df['BB_Std'] * 2)
-                    symbol_df['BB_Lower'] = symbol_df['BB_Middle'] - (symbol_df['BB_Std'] * 2)
-                    
-                    # Calculate MACD (Moving Average Convergence Divergence)
-                    symbol_df['EMA_12'] = symbol_df['Close'].ewm(span=12, adjust=False).mean()
-                    symbol_df['EMA_26'] = symbol_df['Close'].ewm(span=26, adjust=False).mean()
-                    symbol_df['MACD'] = symbol_df['EMA_12'] - symbol_df['EMA_26']
-                    symbol_df['MACD_Signal'] = symbol_df['MACD'].ewm(span=9, adjust=False).mean()
-                    symbol_df['MACD_Histogram'] = symbol_df['MACD'] - symbol_df['MACD_Signal']
-                    
-                    result_dfs.append(symbol_df)
+                # Sort once so each symbol's rows are contiguous and in date order;
+                # the transformers already emit that order, so check before sorting
+                df = df[df['Symbol'].notna()]
+                if not self._is_sorted_by_symbol_and_date(df):
+                    df = df.sort_values(['Symbol', 'Date'], kind='mergesort')
                 
-                # Combine all symbol dataframes
-                result_df = pd.concat(result_dfs)
+                # Worker processes only pay off for wide universes on several cores
+                max_workers = self.parallel_max_workers or os.cpu_count() or 1
+                n_symbols = df['Symbol'].nunique()
+                if max_workers > 1 and self.parallel_min_symbols and n_symbols >= self.parallel_min_symbols:
+                    result_df = self._calculate_stock_metrics_parallel(df, max_workers)
+                else:
+                    result_df = self._calculate_stock_metrics(df)
                 
             # If we have economic indicator data
             elif any(col in df.columns for col in ['GDP_Growth', 'Unemployment_Rate', 'Inflation_Rate']):
-                result_df = df.copy()
+                result_df = df
                 
                 # Calculate YoY (Year-over-Year) changes for relevant metrics
                 # Sort by date first
                 result_df.sort_values('Date', inplace=True)
                 
-                for col in ['GDP_Growth', 'Unemployment_Rate', 'Inflation_Rate', 'Interest_Rate', 'Consumer_Confidence']:
-                    if col in result_df.columns:
-                        # Calculate YoY change
-                        result_df[f'{col}_YoY_Change'] = result_df[col].pct_change(periods=12)  # Assuming monthly data
-                
-                # Calculate correlation matrix for economic indicators if multiple indicators present
                 indicator_cols = [col for col in ['GDP_Growth', 'Unemployment_Rate', 'Inflation_Rate', 
                                                   'Interest_Rate', 'Consumer_Confidence'] 
                                  if col in result_df.columns]
                 
+                # Calculate YoY change for every indicator in one preallocated block
+                values = result_df[indicator_cols].to_numpy(dtype=np.float64)
+                yoy = np.full(values.shape, np.nan)
+                periods = 12  # Assuming monthly data
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    yoy[periods:] = values[periods:] / values[:-periods] - 1
+                result_df = result_df.assign(**{f'{col}_YoY_Change': yoy[:, i] 
+                                                for i, col in enumerate(indicator_cols)})
+                
+                # Calculate correlation matrix for economic indicators if multiple indicators present
                 if len(indicator_cols) > 1:
                     corr_matrix = result_df[indicator_cols].corr()
                     logger.info(f"Correlation matrix calculated for {len(indicator_cols)} indicators")
@@ -152,3 +266,117 @@ class MetricsCalculator:
         except Exception as e:
             logger.error(f"Error calculating metrics: {str(e)}")
             raise
+    
+    def _is_sorted_by_symbol_and_date(self, df):
+        """
+        Check whether a frame is already ordered by symbol and then date.
+        
+        Args:
+            df (pandas.DataFrame): Stock data without missing symbols
+        
+        Returns:
+            bool: True if sorting by ['Symbol', 'Date'] would not reorder it
+        """
+        if not df['Symbol'].is_monotonic_increasing or df['Date'].isna().any():
+            return False
+        
+        symbols = _symbol_codes(df['Symbol'])
+        dates = df['Date'].to_numpy()
+        same_symbol = symbols[1:] == symbols[:-1]
+        return not (same_symbol & (dates[1:] < dates[:-1])).any()
+    
+    def _calculate_stock_metrics(self, df):
+        """
+        Add the stock price metrics to a frame sorted by symbol and date.
+        
+        Args:
+            df (pandas.DataFrame): Stock data with each symbol's rows contiguous
+        
+        Returns:
+            pandas.DataFrame: The same frame with the metric columns added
+        """
+        # Grouped rolling/ewm results come back ordered by symbol and then
+        # by row, which matches the sorted frame, so they are assigned
+        # positionally rather than aligned on the index. Grouping plain
+        # RangeIndex series by integer symbol codes keeps pandas from
+        # building a MultiIndex over the frame's shuffled index per call.
+        by_symbol = _symbol_codes(df['Symbol'])
+        close = pd.Series(df['Close'].to_numpy()).groupby(by_symbol, sort=False)
+        
+        # Calculate returns
+        df['Daily_Return'] = close.pct_change().to_numpy()
+        
+        # Calculate moving averages
+        short_rolling = close.rolling(window=self.short_window)
+        df[self.ma_short_col] = short_rolling.mean().to_numpy()
+        df[self.ma_long_col] = close.rolling(window=self.long_window).mean().to_numpy()
+        
+        # Calculate moving average crossover signal (0 until both averages exist)
+        spread = df[self.ma_short_col].to_numpy() - df[self.ma_long_col].to_numpy()
+        df['MA_Signal'] = np.sign(np.nan_to_num(spread, nan=0.0)).astype(np.int8)
+        
+        # Calculate volatility (standard deviation of returns)
+        returns = pd.Series(df['Daily_Return'].to_numpy()).groupby(by_symbol, sort=False)
+        df['Volatility'] = returns.rolling(window=self.volatility_window).std().to_numpy() * np.sqrt(252)  # Annualized
+        
+        # Calculate Relative Strength Index (RSI) with Wilder's smoothing
+        group_starts = _group_starts(by_symbol)
+        df['RSI'] = _wilder_rsi(df['Close'].to_numpy(np.float64), group_starts, self.rsi_window)
+        
+        # Calculate Bollinger Bands, reusing the short moving average
+        # when the windows match instead of another rolling pass
+        if self.bollinger_window == self.short_window:
+            df['BB_Middle'] = df[self.ma_short_col]
+            df['BB_Std'] = short_rolling.std().to_numpy()
+        else:
+            bb_rolling = close.rolling(window=self.bollinger_window)
+            df['BB_Middle'] = bb_rolling.mean().to_numpy()
+            df['BB_Std'] = bb_rolling.std().to_numpy()
+        df['BB_Upper'] = df['BB_Middle'] + (df['BB_Std'] * 2)
+        df['BB_Lower'] = df['BB_Middle'] - (df['BB_Std'] * 2)
+        
+        # Calculate MACD (Moving Average Convergence Divergence)
+        df['EMA_12'] = close.ewm(span=12, adjust=False).mean().to_numpy()
+        df['EMA_26'] = close.ewm(span=26, adjust=False).mean().to_numpy()
+        df['MACD'] = df['EMA_12'] - df['EMA_26']
+        macd = pd.Series(df['MACD'].to_numpy()).groupby(by_symbol, sort=False)
+        df['MACD_Signal'] = macd.ewm(span=9, adjust=False).mean().to_numpy()
+        df['MACD_Histogram'] = df['MACD'] - df['MACD_Signal']
+        
+        # pandas computes rolling/ewm windows in float64; store the
+        # results at the same float32 precision as the prices
+        if self.use_float32:
+            narrow_dtypes(df, volume=False)
+        
+        return df
+    
+    def _calculate_stock_metrics_parallel(self, df, max_workers):
+        """
+        Compute stock metrics for chunks of whole symbols in worker processes.
+        
+        Args:
+            df (pandas.DataFrame): Stock data sorted by symbol and date
+            max_workers (int): Number of worker processes
+        
+        Returns:
+            pandas.DataFrame: The frame with the metric columns added
+        """
+        group_starts = _group_starts(_symbol_codes(df['Symbol']))
+        
+        # Split on symbol boundaries into a few chunks per worker so the
+        # pickling cost is amortized while keeping the workers busy
+        n_chunks = min(len(group_starts), max_workers * 4)
+        edges = group_starts[np.linspace(0, len(group_starts), n_chunks, endpoint=False).astype(int)]
+        edges = np.r_[edges, len(df)]
+        chunks = [df.iloc[start:end] for start, end in zip(edges[:-1], edges[1:])]
+        
+        logger.info(f"Calculating metrics for {len(group_starts)} symbols in {len(chunks)} chunks "
+                    f"across {max_workers} processes")
+        # Never fork: the parent may hold locks in numba's and the scheduler's
+        # thread pools that a forked child would inherit held
+        start_method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+        with ProcessPoolExecutor(max_workers=max_workers, 
+                                 mp_context=multiprocessing.get_context(start_method)) as executor:
+            results = list(executor.map(self._calculate_stock_metrics, chunks))
+        
+        return pd.concat(results)
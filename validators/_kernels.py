@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Compiled kernels for the Data Validator.
+
+numba is optional: ``clean_prices`` is None when it is not installed and the
+validator uses its numpy implementation instead.
+"""
+
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # pragma: no cover - numba is optional
+    njit = None
+
+def _clean_prices(arr, min_price, max_price):
+    """
+    Repair out-of-range prices and inconsistent OHLC rows in one array.
+    
+    Each column has its values outside ``[min_price, max_price]`` replaced by
+    the previous valid value (or the next one, for a leading run); NaN gaps
+    are left as they are. Then every row whose High/Low do not bracket Open
+    and Close gets High set to the row maximum and Low to the row minimum of
+    its non-missing prices.
+    
+    Args:
+        arr (numpy.ndarray): (n, k) prices, columns Open, High, Low, Close
+            followed by any other price columns; modified in place
+        min_price (float): Lowest valid price, in ``arr``'s dtype
+        max_price (float): Highest valid price, in ``arr``'s dtype
+    
+    Returns:
+        tuple: (per-column count of invalid prices, count of inconsistent rows)
+    """
+    n, k = arr.shape
+    invalid_counts = np.zeros(k, dtype=np.int64)
+    
+    for j in range(k):
+        # Forward pass: invalid values take the last valid one
+        count = 0
+        leading = 0
+        last = np.nan
+        for i in range(n):
+            value = arr[i, j]
+            if value < min_price or value > max_price:
+                count += 1
+                if np.isnan(last):
+                    leading = i + 1
+                else:
+                    arr[i, j] = last
+            elif not np.isnan(value):
+                last = value
+        invalid_counts[j] = count
+        
+        # A leading invalid run takes the first valid value instead (NaN if
+        # the column has none)
+        if leading > 0:
+            first = np.nan
+            for i in range(leading, n):
+                value = arr[i, j]
+                if not np.isnan(value) and min_price <= value <= max_price:
+                    first = value
+                    break
+            for i in range(leading):
+                value = arr[i, j]
+                if value < min_price or value > max_price:
+                    arr[i, j] = first
+    
+    inconsistent = 0
+    for i in range(n):
+        open_, high, low, close = arr[i, 0], arr[i, 1], arr[i, 2], arr[i, 3]
+        if high < low or high < open_ or high < close or low > open_ or low > close:
+            inconsistent += 1
+            
+            # NaN compares false, so missing prices drop out of max/min
+            top = -np.inf
+            bottom = np.inf
+            for m in range(4):
+                value = arr[i, m]
+                if value > top:
+                    top = value
+                if value < bottom:
+                    bottom = value
+            arr[i, 1] = top
+            arr[i, 2] = bottom
+    
+    return invalid_counts, inconsistent
+
+if njit is not None:
+    # Serial on purpose: numba's parallel thread pool is not fork-safe and would
+    # deadlock the MetricsCalculator worker processes forked after it starts
+    clean_prices = njit(cache=True)(_clean_prices)
+else:  # pragma: no cover - numba is optional
+    clean_prices = None
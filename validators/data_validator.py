@@ -5,12 +5,29 @@
 Data Validator module for validating financial market data.
 """
 
+import hashlib
 import logging
+from collections import OrderedDict
 import pandas as pd
 import numpy as np
 
+try:
+    import bottleneck as bn
+except ImportError:  # pragma: no cover - bottleneck is optional
+    bn = None
+
+from dtypes import PRICE_COLUMNS, narrow_dtypes
+from validators._kernels import clean_prices
+
 logger = logging.getLogger(__name__)
 
+# Reasonable ranges for the economic indicators: (column, low, high, description)
+INDICATOR_RANGES = [
+    ('GDP_Growth', -10, 15, 'GDP growth'),  # GDP growth rarely exceeds -10% to +15%
+    ('Unemployment_Rate', 0, 30, 'unemployment rate'),  # Generally between 0% and 30%
+    ('Inflation_Rate', -5, 25, 'inflation rate'),  # Between -5% and 25% in most economies
+]
+
 class DataValidator:
     """Validates financial market data for quality and consistency."""
     
@@ -25,6 +42,16 @@ class DataValidator:
         self.min_price = config.min_stock_price
         self.max_price = config.max_stock_price
         self.max_missing_pct = config.max_missing_percentage
+        self.max_fill_gap = config.max_fill_gap
+        self.use_float32 = config.use_float32
+        self.cache_enabled = config.enable_validation_cache
+        self.cache_size = config.validation_cache_size
+        self._cache = OrderedDict()  # content key -> validated frame, oldest first
+        
+        # Compile the price kernel for the dtype validate() will see
+        if clean_prices is not None:
+            dtype = np.float32 if self.use_float32 else np.float64
+            clean_prices(np.ones((1, 4), dtype=dtype), dtype(0), dtype(2))
     
     def validate(self, data):
         """
@@ -40,119 +67,141 @@ class DataValidator:
             logger.warning("No data to validate")
             return pd.DataFrame()
         
+        key = self._cache_key(data) if self.cache_enabled else None
+        if key is not None and key in self._cache:
+            self._cache.move_to_end(key)
+            logger.info(f"Reusing validation result for {len(data)} unchanged rows")
+            return self._cache[key].copy(deep=False)
+        
+        df = self._validate_frame(data)
+        
+        if key is not None:
+            # Cache a shallow copy so the caller adding columns to the
+            # returned frame does not change the cached one
+            self._cache[key] = df.copy(deep=False)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        
+        return df
+    
+    def validate_iter(self, chunks):
+        """
+        Validate data one chunk at a time, so only a chunk (rather than the
+        whole history) has to be in memory.
+        
+        Forward fills carry across chunk boundaries: each chunk is validated
+        together with the last row of the previous one. Backward fills (for
+        leading gaps and invalid values) only look within a chunk. Chunks
+        are never cached, so memory stays bounded by the chunk size.
+        
+        This is for callers that already hold processed data in chunks; the
+        orchestrator validates whole frames, since the transformer's rolling
+        metrics need each symbol's full history anyway.
+        
+        Args:
+            chunks (iterable): Processed data as consecutive DataFrames
+        
+        Yields:
+            pandas.DataFrame: Validated chunks, in input order
+        """
+        carry = None
+        for chunk in chunks:
+            if chunk is None or len(chunk) == 0:
+                logger.warning("No data to validate")
+                continue
+            
+            if carry is None:
+                validated = self._validate_frame(chunk)
+            else:
+                validated = self._validate_frame(pd.concat([carry, chunk])).iloc[1:]
+            
+            carry = validated.iloc[-1:][chunk.columns]
+            yield validated
+    
+    def _validate_frame(self, data):
+        """
+        Validate a single non-empty frame.
+        
+        Args:
+            data (pandas.DataFrame): Processed data to validate
+        
+        Returns:
+            pandas.DataFrame: Validated data (with invalid values handled)
+        """
         logger.info("Validating financial data")
         
         try:
-            # Make a copy to avoid modifying the original data
-            df = data.copy()
+            # Shallow copy: columns are only replaced below, never written in
+            # place, so the caller's frame is untouched without copying data
+            df = data.copy(deep=False)
             
             # Check if this is stock price data
             if 'Symbol' in df.columns and 'Close' in df.columns:
-                # Check for missing values
-                missing_pct = df.isnull().mean() * 100
-                logger.info(f"Missing value percentages: {missing_pct.to_dict()}")
+                # Concatenating sources with different categories (e.g. CSV and
+                # API symbols) falls back to strings; restore the categoricals
+                for col in ['Symbol', 'Source']:
+                    if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+                        df[col] = df[col].astype('category')
+                
+                # A no-op when the transformer and metrics already narrowed them
+                if self.use_float32:
+                    narrow_dtypes(df, PRICE_COLUMNS + ['Daily_Return'])
                 
-                # Identify columns with too many missing values
-                problem_cols = missing_pct[missing_pct > self.max_missing_pct * 100].index.tolist()
-                if problem_cols:
-                    logger.warning(f"Columns with excessive missing values: {problem_cols}")
+                # Check for missing values; the scan only feeds log messages
+                if logger.isEnabledFor(logging.WARNING):
+                    missing_pct = df.isnull().mean() * 100
+                    if logger.isEnabledFor(logging.INFO):
+                        logger.info(f"Missing value percentages: {missing_pct.to_dict()}")
+                    
+                    # Identify columns with too many missing values
+                    problem_cols = missing_pct[missing_pct > self.max_missing_pct * 100].index.tolist()
+                    if problem_cols:
+                        logger.warning(f"Columns with excessive missing values: {problem_cols}")
                 
                 # Fill remaining missing values
                 # For critical financial data, forward-fill is often better than mean/median
-                df = df.ffill()  # forward fill
-                df = df.bfill()  # then backward fill
+                df = self._fill_missing(df)
                 
                 # Validate price ranges
                 price_cols = ['Open', 'High', 'Low', 'Close', 'Adj_Close'] 
                 price_cols = [col for col in price_cols if col in df.columns]
                 
-                for col in price_cols:
-                    # Flag out-of-range values
-                    invalid_prices = df[(df[col] < self.min_price) | (df[col] > self.max_price)]
-                    if len(invalid_prices) > 0:
-                        logger.warning(f"Found {len(invalid_prices)} invalid {col} prices")
-                        
-                        # Replace invalid values with valid values from nearby rows
-                        df.loc[(df[col] < self.min_price) | (df[col] > self.max_price), col] = np.nan
-                        df[col].fillna(method='ffill', inplace=True)
-                        df[col].fillna(method='bfill', inplace=True)
-                
-                # Ensure High >= Open >= Low and High >= Close >= Low
-                inconsistent_rows = df[(df['High'] < df['Low']) | 
-                                       (df['High'] < df['Open']) | 
-                                       (df['High'] < df['Close']) | 
-                                       (df['Low'] > df['Open']) | 
-                                       (df['Low'] > df['Close'])]
-                
-                if len(inconsistent_rows) > 0:
-                    logger.warning(f"Found {len(inconsistent_rows)} rows with inconsistent price relationships")
-                    
-                    # Fix inconsistent price relationships
-                    for idx, row in inconsistent_rows.iterrows():
-                        # Find the max and min values
-                        max_price = max(row['Open'], row['High'], row['Low'], row['Close'])
-                        min_price = min(row['Open'], row['High'], row['Low'], row['Close'])
-                        
-                        # Set High to the max value
-                        df.at[idx, 'High'] = max_price
-                        
-                        # Set Low to the min value
-                        df.at[idx, 'Low'] = min_price
+                if price_cols:
+                    df = self._check_prices(df, price_cols)
                 
                 # Validate volume data
                 if 'Volume' in df.columns:
                     # Volume should be non-negative
-                    invalid_volume = df[df['Volume'] < 0]
-                    if len(invalid_volume) > 0:
-                        logger.warning(f"Found {len(invalid_volume)} negative volume values")
-                        df.loc[df['Volume'] < 0, 'Volume'] = 0
+                    n_negative = (df['Volume'].to_numpy() < 0).sum()
+                    if n_negative > 0:
+                        logger.warning(f"Found {n_negative} negative volume values")
+                        df['Volume'] = df['Volume'].clip(lower=0)
                 
                 # Validate calculated metrics
                 if 'Daily_Return' in df.columns:
                     # Returns should be within reasonable limits (-50% to +50% daily is extreme)
-                    extreme_returns = df[(df['Daily_Return'] < -0.5) | (df['Daily_Return'] > 0.5)]
-                    if len(extreme_returns) > 0:
-                        logger.warning(f"Found {len(extreme_returns)} extreme daily returns")
-                        
-                        # Flag these as potential data issues
-                        # In a real system, these might need manual review
-                        df['Extreme_Return_Flag'] = False
-                        df.loc[(df['Daily_Return'] < -0.5) | (df['Daily_Return'] > 0.5), 'Extreme_Return_Flag'] = True
+                    extreme_returns = np.abs(df['Daily_Return'].to_numpy()) > 0.5
+                    n_extreme = extreme_returns.sum()
+                    if n_extreme > 0:
+                        logger.warning(f"Found {n_extreme} extreme daily returns")
+                    
+                    # Flag these as potential data issues
+                    # In a real system, these might need manual review
+                    # The flag is always added so every chunk has the same columns
+                    df['Extreme_Return_Flag'] = extreme_returns
             
             # If we have economic indicator data
-            elif any(col in df.columns for col in ['GDP_Growth', 'Unemployment_Rate', 'Inflation_Rate']):
+            elif any(col in df.columns for col, _, _, _ in INDICATOR_RANGES):
                 # Check for missing values
-                missing_pct = df.isnull().mean() * 100
-                logger.info(f"Missing value percentages: {missing_pct.to_dict()}")
+                if logger.isEnabledFor(logging.INFO):
+                    missing_pct = df.isnull().mean() * 100
+                    logger.info(f"Missing value percentages: {missing_pct.to_dict()}")
                 
                 # Fill missing values
-                df.fillna(method='ffill', inplace=True)
-                df.fillna(method='bfill', inplace=True)
+                df = self._fill_missing(df)
                 
                 # Validate indicator values based on reasonable ranges
-                if 'GDP_Growth' in df.columns:
-                    # GDP growth rarely exceeds -10% to +15%
-                    invalid_gdp = df[(df['GDP_Growth'] < -10) | (df['GDP_Growth'] > 15)]
-                    if len(invalid_gdp) > 0:
-                        logger.warning(f"Found {len(invalid_gdp)} invalid GDP growth values")
-                        df.loc[(df['GDP_Growth'] < -10) | (df['GDP_Growth'] > 15), 'GDP_Growth'] = np.nan
-                        df['GDP_Growth'].fillna(method='ffill', inplace=True)
-                
-                if 'Unemployment_Rate' in df.columns:
-                    # Unemployment rate is generally between 0% and 30%
-                    invalid_unemp = df[(df['Unemployment_Rate'] < 0) | (df['Unemployment_Rate'] > 30)]
-                    if len(invalid_unemp) > 0:
-                        logger.warning(f"Found {len(invalid_unemp)} invalid unemployment rate values")
-                        df.loc[(df['Unemployment_Rate'] < 0) | (df['Unemployment_Rate'] > 30), 'Unemployment_Rate'] = np.nan
-                        df['Unemployment_Rate'].fillna(method='ffill', inplace=True)
-                
-                if 'Inflation_Rate' in df.columns:
-                    # Inflation rate is generally between -5% and 25% in most economies
-                    invalid_inf = df[(df['Inflation_Rate'] < -5) | (df['Inflation_Rate'] > 25)]
-                    if len(invalid_inf) > 0:
-                        logger.warning(f"Found {len(invalid_inf)} invalid inflation rate values")
-                        df.loc[(df['Inflation_Rate'] < -5) | (df['Inflation_Rate'] > 25), 'Inflation_Rate'] = np.nan
-                        df['Inflation_Rate'].fillna(method='ffill', inplace=True)
+                df = self._check_indicator_ranges(df)
             
             logger.info(f"Data validation completed for {len(df)} rows")
             return df
@@ -160,3 +209,225 @@ class DataValidator:
         except Exception as e:
             logger.error(f"Error validating data: {str(e)}")
             raise
+    
+    def _cache_key(self, data):
+        """
+        Fingerprint a frame's layout and contents, together with the settings
+        that change the validated result, for the validation cache.
+        
+        Args:
+            data (pandas.DataFrame): Data about to be validated
+        
+        Returns:
+            tuple: (settings, columns, dtypes, 16-byte digest), or None if the
+            data cannot be hashed
+        """
+        try:
+            hashes = pd.util.hash_pandas_object(data, index=True).to_numpy()
+        except TypeError:
+            return None
+        
+        digest = hashlib.blake2b(hashes.tobytes(), digest_size=16).digest()
+        settings = (self.min_price, self.max_price, self.max_fill_gap, self.use_float32)
+        return settings, tuple(data.columns), tuple(str(dtype) for dtype in data.dtypes), digest
+    
+    def _check_indicator_ranges(self, df):
+        """
+        Replace out-of-range economic indicator values with the previous
+        valid value, checking every indicator column in a single pass.
+        
+        Args:
+            df (pandas.DataFrame): Economic data after gap filling
+        
+        Returns:
+            pandas.DataFrame: Data with invalid indicator values replaced
+        """
+        ranges = [entry for entry in INDICATOR_RANGES if entry[0] in df.columns]
+        cols = [col for col, _, _, _ in ranges]
+        low = np.array([lo for _, lo, _, _ in ranges], dtype=np.float64)
+        high = np.array([hi for _, _, hi, _ in ranges], dtype=np.float64)
+        
+        # One centered compare per value: outside [low, high]
+        values = df[cols].to_numpy(dtype=np.float64, copy=True)
+        invalid = np.abs(values - (low + high) / 2) > (high - low) / 2
+        counts = invalid.sum(axis=0)
+        if not counts.any():
+            return df
+        
+        for (_, _, _, description), n_invalid in zip(ranges, counts):
+            if n_invalid > 0:
+                logger.warning(f"Found {n_invalid} invalid {description} values")
+        
+        # Forward-fill only, as before: a leading invalid value stays NaN.
+        # Gaps left open by max_fill_gap are not invalid and stay unfilled
+        values[invalid] = np.nan
+        if bn is not None:
+            filled = bn.push(values, axis=0)
+        else:
+            filled = pd.DataFrame(values).ffill().to_numpy()
+        values[invalid] = filled[invalid]
+        
+        fixed = [j for j, n_invalid in enumerate(counts) if n_invalid > 0]
+        df[[cols[j] for j in fixed]] = values[:, fixed]
+        return df
+    
+    def _fill_missing(self, df):
+        """
+        Forward-fill and then backward-fill every column of a frame.
+        
+        Runs longer than ``max_fill_gap`` values are only filled that far
+        from each side, so long outages (halted or delisted tickers) stay
+        visible as missing data. Float columns are filled as one 2D array per
+        dtype with ``bottleneck.push`` when it is installed; the remaining
+        columns (and everything, without bottleneck) use pandas ffill/bfill.
+        
+        Args:
+            df (pandas.DataFrame): Data with missing values
+        
+        Returns:
+            pandas.DataFrame: Data with missing values filled
+        """
+        other_cols = list(df.columns)
+        if bn is not None:
+            for dtype in (np.float32, np.float64):
+                cols = [col for col in df.columns if df[col].dtype == dtype]
+                if not cols:
+                    continue
+                
+                other_cols = [col for col in other_cols if col not in cols]
+                values = df[cols].to_numpy(dtype=dtype)
+                if not np.isnan(values).any():
+                    continue
+                
+                values = bn.push(values, n=self.max_fill_gap, axis=0)
+                values = bn.push(values[::-1], n=self.max_fill_gap, axis=0)[::-1]
+                df[cols] = values
+        
+        # Remaining columns only need a pass if they actually have gaps
+        other_cols = [col for col in other_cols if df[col].isna().any()]
+        if other_cols:
+            df[other_cols] = (df[other_cols].ffill(limit=self.max_fill_gap)
+                              .bfill(limit=self.max_fill_gap))
+        
+        return df
+    
+    def _check_prices(self, df, price_cols):
+        """
+        Repair out-of-range prices and inconsistent OHLC rows.
+        
+        The price columns are packed into one array once; the checks and
+        repairs all work on that array, and it is written back to the frame
+        in one assignment only if something had to be repaired.
+        
+        Args:
+            df (pandas.DataFrame): Stock data after gap filling
+            price_cols (list): Price columns present in the data, in the
+                order Open, High, Low, Close, Adj_Close
+        
+        Returns:
+            pandas.DataFrame: Data with prices repaired
+        """
+        has_ohlc = price_cols[:4] == ['Open', 'High', 'Low', 'Close']
+        dtype = np.result_type(np.float32, *[df[col].dtype for col in price_cols])
+        prices = df[price_cols].to_numpy(dtype=dtype)
+        
+        # Bounds in the array's dtype so every path compares alike
+        min_price = dtype.type(self.min_price)
+        max_price = dtype.type(self.max_price)
+        
+        # Clean upstream data needs only this read-only check
+        if self._prices_valid(prices, min_price, max_price, has_ohlc):
+            return df
+        
+        if not prices.flags.writeable:
+            prices = prices.copy()
+        
+        if clean_prices is not None and has_ohlc:
+            invalid_counts, inconsistent = clean_prices(prices, min_price, max_price)
+        else:
+            invalid_counts, inconsistent = self._clean_prices_numpy(prices, min_price, max_price, has_ohlc)
+        
+        for col, n_invalid in zip(price_cols, invalid_counts):
+            if n_invalid > 0:
+                logger.warning(f"Found {n_invalid} invalid {col} prices")
+        if inconsistent > 0:
+            logger.warning(f"Found {inconsistent} rows with inconsistent price relationships")
+        
+        df[price_cols] = prices
+        return df
+    
+    def _prices_valid(self, prices, min_price, max_price, has_ohlc):
+        """
+        Check whether packed prices are all present, in range and (with a
+        full set of OHLC columns) consistent.
+        
+        Args:
+            prices (numpy.ndarray): (n, k) price array
+            min_price (float): Lowest valid price
+            max_price (float): Highest valid price
+            has_ohlc (bool): Whether the first four columns are Open, High,
+                Low, Close
+        
+        Returns:
+            bool: True if no price needs repairing
+        """
+        # NaN fails both compares, so gaps count as needing repair
+        if not ((prices >= min_price) & (prices <= max_price)).all():
+            return False
+        
+        if not has_ohlc:
+            return True
+        
+        ohlc = prices[:, :4]
+        return bool((ohlc[:, 1] >= ohlc.max(axis=1)).all() and 
+                    (ohlc[:, 2] <= ohlc.min(axis=1)).all())
+    
+    def _clean_prices_numpy(self, prices, min_price, max_price, has_ohlc):
+        """
+        Repair packed prices in place without the compiled kernel; used when
+        numba is not installed.
+        
+        Args:
+            prices (numpy.ndarray): (n, k) price array, modified in place
+            min_price (float): Lowest valid price
+            max_price (float): Highest valid price
+            has_ohlc (bool): Whether the first four columns are Open, High,
+                Low, Close
+        
+        Returns:
+            tuple: (per-column count of invalid prices, count of inconsistent rows)
+        """
+        invalid_counts = []
+        for j in range(prices.shape[1]):
+            # Flag out-of-range values. Unlike the indicator ranges, the
+            # price bounds have no exact binary midpoint, so a centered
+            # abs() test could misclassify prices near min_price
+            values = prices[:, j]
+            invalid = (values < min_price) | (values > max_price)
+            n_invalid = invalid.sum()
+            invalid_counts.append(n_invalid)
+            if n_invalid > 0:
+                # Replace invalid values with valid values from nearby rows,
+                # leaving any unfilled gaps alone
+                nearby = np.where(invalid, np.nan, values)
+                if bn is not None:
+                    nearby = bn.push(bn.push(nearby)[::-1])[::-1]
+                else:
+                    nearby = pd.Series(nearby).ffill().bfill().to_numpy()
+                values[invalid] = nearby[invalid]
+        
+        if not has_ohlc:
+            return invalid_counts, 0
+        
+        # Ensure High >= Open >= Low and High >= Close >= Low: High must be the
+        # row maximum and Low the row minimum (fmax/fmin skip missing prices)
+        ohlc = prices[:, :4]
+        row_max = np.fmax.reduce(ohlc, axis=1)
+        row_min = np.fmin.reduce(ohlc, axis=1)
+        inconsistent = (ohlc[:, 1] < row_max) | (ohlc[:, 2] > row_min)
+        
+        # Fix inconsistent price relationships: High becomes the row
+        # maximum and Low the row minimum of the four prices
+        prices[inconsistent, 1] = row_max[inconsistent]
+        prices[inconsistent, 2] = row_min[inconsistent]
+        return invalid_counts, inconsistent.sum()